@@ -5,103 +5,95 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import your news scraper
 from news_scrape import get_astronomy_articles
+from news_summarize import indexed_summary
+from summary_cache import get_summary_cache, cache_key
+from article_store import get_store
+from article_index import get_article_index
+from near_duplicates import get_near_duplicate_index, split_representatives, copy_summaries
+import metrics
 
-import json
-import requests
 from dotenv import load_dotenv
-import time
+
+from openrouter_client import summarize_batch, stream_summary, OPENROUTER_MODEL, TEMPERATURE, TOP_P
 
 # Load environment variables
 load_dotenv()
 
+FAILED_SUMMARY = "Summarization failed after multiple attempts"
+
+
+def llama33_summarize_many(texts, max_tokens=200, retries=3, **client_options):
+    """
+    Summarize several articles using Llama 3.3 8B Instruct Free model
+    Cached summaries are returned directly, the rest are requested concurrently
+    through the rate-limited OpenRouter client
+    Returns summaries in input order
+    """
+    # Identical content with identical settings was already summarized
+    cache = get_summary_cache()
+    keys = [cache_key(text, OPENROUTER_MODEL, max_tokens=max_tokens,
+                      temperature=TEMPERATURE, top_p=TOP_P) for text in texts]
+    summaries = [cache.get(key) for key in keys]
+    misses = [i for i, summary in enumerate(summaries) if summary is None]
+
+    if len(misses) < len(texts):
+        print(f"✅ {len(texts) - len(misses)} summaries served from cache")
+    metrics.count("summary_cache_hits_total", len(texts) - len(misses), source="openrouter")
+    metrics.count("summary_cache_misses_total", len(misses), source="openrouter")
+    if not misses:
+        return summaries
+
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise ValueError(
+            "OPENROUTER_API_KEY not found in environment variables")
+
+    print(f"🔄 Requesting {len(misses)} summaries from Llama 3.3 8B Free")
+    results = summarize_batch([texts[i] for i in misses], api_key, max_tokens,
+                              retries=retries, **client_options)
+
+    for i, result in zip(misses, results):
+        if result:
+            cache.put(keys[i], result)
+            summaries[i] = result
+        else:
+            summaries[i] = FAILED_SUMMARY
+
+    return summaries
+
 
 def llama33_summarizer(article_text, max_tokens=200, retries=3):
     """Summarize article using Llama 3.3 8B Instruct Free model"""
+    return llama33_summarize_many([article_text], max_tokens, retries)[0]
+
+
+def llama33_summarize_stream(article_text, max_tokens=200, retries=3, **client_options):
+    """
+    Summarize one article with Llama 3.3 8B Instruct Free, yielding the summary as it is written
+    A cached summary is yielded whole; a new one is cached once the stream ends.
+    Raises OpenRouterError when no complete summary could be streamed
+    """
+    cache = get_summary_cache()
+    key = cache_key(article_text, OPENROUTER_MODEL, max_tokens=max_tokens,
+                    temperature=TEMPERATURE, top_p=TOP_P)
+    cached = cache.get(key)
+    metrics.count("summary_cache_hits_total" if cached is not None else "summary_cache_misses_total",
+                  source="openrouter")
+    if cached is not None:
+        yield cached
+        return
 
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
         raise ValueError(
             "OPENROUTER_API_KEY not found in environment variables")
 
-    for attempt in range(retries):
-        try:
-            print(
-                f"🔄 Attempt {attempt + 1}/{retries} - Using Llama 3.3 8B Free")
-
-            response = requests.post(
-                url="https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
-                },
-                data=json.dumps({
-                    "model": "meta-llama/llama-3.3-8b-instruct:free",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are an expert astronomy and space science summarizer. Provide clear, concise summaries that highlight key scientific discoveries and their significance."
-                        },
-                        {
-                            "role": "user",
-                            "content": f"Please summarize this astronomy news article in 2-3 clear sentences, focusing on the main scientific findings:\n\n{article_text[:2000]}"
-                        }
-                    ],
-                    "max_tokens": max_tokens,
-                    "temperature": 0.3,
-                    "top_p": 0.9,
-                    "stream": False
-                }),
-                timeout=30
-            )
-
-            print(f"📡 Response Status: {response.status_code}")
-
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-
-                    if "choices" in result and len(result["choices"]) > 0:
-                        content = result["choices"][0]["message"]["content"]
-
-                        if content and content.strip():
-                            print(f"✅ Summary generated successfully")
-                            return content.strip()
-                        else:
-                            print("⚠️ Empty content received")
-                    else:
-                        print("⚠️ No choices in response")
-
-                except json.JSONDecodeError as e:
-                    print(f"❌ JSON decode error: {e}")
-
-            elif response.status_code == 429:
-                print("⏳ Rate limited - waiting 10 seconds...")
-                time.sleep(10)
-                continue
-
-            elif response.status_code == 503:
-                print("⏳ Server busy - waiting 5 seconds...")
-                time.sleep(5)
-                continue
-
-            else:
-                print(f"❌ HTTP Error {response.status_code}: {response.text}")
-
-        except requests.exceptions.Timeout:
-            print("⏳ Request timeout - retrying...")
-
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Request error: {e}")
-
-        # Wait before retry
-        if attempt < retries - 1:
-            print(f"⏳ Waiting 2 seconds before retry...")
-            time.sleep(2)
-
-    return "Summarization failed after multiple attempts"
-
-
+    pieces = []
+    for piece in stream_summary(article_text, api_key, max_tokens, retries=retries, **client_options):
+        pieces.append(piece)
+        yield piece
 
+    cache.put(key, "".join(pieces).strip())
 
 
 def summarize_astronomy_news():
@@ -111,7 +103,8 @@ def summarize_astronomy_news():
 
     # Fetch articles
     print("\n📡 Fetching astronomy articles...")
-    articles = get_astronomy_articles()
+    articles = get_astronomy_articles(index=get_article_index(),
+                                      near_duplicates=get_near_duplicate_index())
 
     if not articles:
         print("❌ No articles found!")
@@ -120,47 +113,53 @@ def summarize_astronomy_news():
     print(f"📰 Found {len(articles)} articles to summarize")
     print("-" * 70)
 
-    summarized_articles = []
-
+    to_summarize = []
     for i, article in enumerate(articles, 1):
-        try:
-            if article.get('content') and len(article['content'].strip()) > 100:
-                print(f"\n🔄 Processing Article {i}/{len(articles)}")
-                print(f"📰 Title: {article['title'][:70]}...")
-                print(
-                    f"📊 Content length: {len(article['content'])} characters")
-
-                # Summarize with Llama 3.3 8B
-                summary = llama33_summarizer(article['content'])
-
-                if summary and not summary.startswith("❌"):
-                    # Store summary in article
-                    article['summary'] = summary
-                    summarized_articles.append(article)
+        if article.get('content') and len(article['content'].strip()) > 100:
+            print(f"📰 Article {i}/{len(articles)}: {article['title'][:70]}...")
+            print(
+                f"📊 Content length: {len(article['content'])} characters")
+            to_summarize.append(article)
+        else:
+            print(f"⏭️ Skipping article {i}: Content too short")
 
-                    print(f"✅ Summary: {summary}")
-                else:
-                    print(f"❌ Failed to summarize article {i}")
+    # Near-duplicates reuse the summary of their cluster representative
+    representatives, copies = split_representatives(to_summarize, indexed_summary)
+    if len(representatives) < len(to_summarize):
+        print(f"♻️ {len(to_summarize) - len(representatives)} near-duplicates reuse another summary")
 
-                print("-" * 50)
+    # Summarize with Llama 3.3 8B, all articles in flight at once within the rate limit
+    summarized_articles = []
+    try:
+        summaries = llama33_summarize_many([article['content'] for article in representatives])
+    except Exception as e:
+        print(f"❌ Error summarizing articles: {e}")
+        summaries = [FAILED_SUMMARY] * len(representatives)
 
-                # Rate limiting for free tier
-                time.sleep(1)
+    # Store summaries in articles
+    for article, summary in zip(representatives, summaries):
+        article['summary'] = summary
+    copy_summaries(representatives, copies)
 
-            else:
-                print(f"⏭️ Skipping article {i}: Content too short")
+    for article in to_summarize:
+        summary = article.get('summary')
+        print("-" * 50)
+        print(f"📰 Title: {article['title'][:70]}...")
+        if summary and summary != FAILED_SUMMARY:
+            summarized_articles.append(article)
 
-        except Exception as e:
-            print(f"❌ Error processing article {i}: {e}")
-            continue
+            print(f"✅ Summary: {summary}")
+        else:
+            print("❌ Failed to summarize article")
 
     print(
         f"\n🎉 Successfully summarized {len(summarized_articles)}/{len(articles)} articles!")
+    metrics.flush()
     return summarized_articles
 
 
-def save_summaries(articles, filename="llama33_summaries.json"):
-    """Save summarized articles to JSON file"""
+def save_summaries(articles, filename="llama33_summaries.jsonl"):
+    """Append summarized articles to the JSON Lines summary store"""
     try:
         # Prepare data for JSON serialization
         save_data = []
@@ -175,18 +174,21 @@ def save_summaries(articles, filename="llama33_summaries.json"):
                     'content_length': len(article.get('content', ''))
                 })
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(save_data, f, indent=2, ensure_ascii=False)
+        store = get_store(filename, legacy_json=filename.replace('.jsonl', '.json'))
+        first = len(store) + 1
+        store.extend(save_data)
+        get_article_index().add_many(save_data)
 
         print(f"💾 Saved {len(save_data)} summaries to {filename}")
 
-        # Also create a readable text file
-        text_filename = filename.replace('.json', '.txt')
-        with open(text_filename, 'w', encoding='utf-8') as f:
-            f.write("ASTRONOMY NEWS SUMMARIES\n")
-            f.write("="*50 + "\n\n")
+        # Also append to a readable text file
+        text_filename = filename.replace('.jsonl', '.txt')
+        with open(text_filename, 'a', encoding='utf-8') as f:
+            if f.tell() == 0:
+                f.write("ASTRONOMY NEWS SUMMARIES\n")
+                f.write("="*50 + "\n\n")
 
-            for i, article in enumerate(save_data, 1):
+            for i, article in enumerate(save_data, first):
                 f.write(f"{i}. {article['title']}\n")
                 f.write(f"   Source: {article['source']}\n")
                 f.write(f"   Summary: {article['summary']}\n")
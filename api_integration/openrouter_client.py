@@ -0,0 +1,320 @@
+import asyncio
+import email.utils
+import json
+import queue
+import random
+import threading
+import time
+
+import aiohttp
+
+import metrics
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_MODEL = "meta-llama/llama-3.3-8b-instruct:free"
+TEMPERATURE = 0.3
+TOP_P = 0.9
+
+REQUESTS_PER_MINUTE = 20    # Free tier limit
+MAX_IN_FLIGHT = 4           # Concurrent requests
+BACKOFF_BASE = 2.0          # Seconds, doubled on every retry
+BACKOFF_MAX = 60.0
+REQUEST_TIMEOUT = 30
+
+SYSTEM_PROMPT = "You are an expert astronomy and space science summarizer. Provide clear, concise summaries that highlight key scientific discoveries and their significance."
+USER_PROMPT = "Please summarize this astronomy news article in 2-3 clear sentences, focusing on the main scientific findings:\n\n{text}"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def build_payload(article_text, max_tokens=200, stream=False):
+    """Chat completion request body for summarizing one article"""
+    return {
+        "model": OPENROUTER_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": USER_PROMPT.format(text=article_text[:2000])}
+        ],
+        "max_tokens": max_tokens,
+        "temperature": TEMPERATURE,
+        "top_p": TOP_P,
+        "stream": stream
+    }
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def iter_sse_events(stream):
+    """
+    Data payloads of the Server-Sent Events in a byte line stream
+    Comment lines (": OPENROUTER PROCESSING" keep-alives) and fields other than
+    data are skipped; the data lines of one event are joined with newlines
+    """
+    data = []
+    async for raw in stream:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+        elif not line.startswith(":"):
+            field, _, value = line.partition(":")
+            if field == "data":
+                data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+
+class OpenRouterError(Exception):
+    """A streamed summary could not be completed"""
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` requests per second on average,
+    with bursts of up to `capacity` requests
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                refill_from = max(self.updated, self.paused_until)
+                self.tokens = min(self.capacity, self.tokens + (now - refill_from) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Hold back every caller for `seconds`, e.g. after the server asked us to slow down"""
+        self.tokens = 0
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class OpenRouterClient:
+    """
+    Async OpenRouter client sharing one pooled HTTP session
+    Requests are limited to `max_in_flight` at a time and to `requests_per_minute`
+    by a token bucket. 429/5xx answers are retried with exponential backoff,
+    honouring the server's Retry-After header when it sends one
+
+    async with OpenRouterClient(api_key) as client:
+        summaries = await client.summarize_many(texts)
+    """
+
+    def __init__(self, api_key, base_url=OPENROUTER_URL, max_in_flight=MAX_IN_FLIGHT,
+                 requests_per_minute=REQUESTS_PER_MINUTE, retries=3):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.retries = retries
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(requests_per_minute / 60.0, capacity=max_in_flight)
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_in_flight),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            })
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before retry number `attempt` (0-based)"""
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_MAX)
+        delay = min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def summarize(self, article_text, max_tokens=200):
+        """Summary of one article, or None when every attempt failed"""
+        payload = build_payload(article_text, max_tokens)
+
+        for attempt in range(self.retries):
+            retry_after = None
+            await self.bucket.acquire()
+
+            try:
+                async with self._in_flight:
+                    with metrics.span("api_request"):
+                        async with self.session.post(self.base_url, json=payload) as response:
+                            if response.status == 200:
+                                result = await response.json(content_type=None)
+                                choices = result.get("choices") or []
+                                content = choices[0]["message"]["content"] if choices else None
+                                usage = result.get("usage") or {}
+                                metrics.count("api_completion_tokens_total", usage.get("completion_tokens", 0))
+                                if content and content.strip():
+                                    return content.strip()
+                                print("⚠️ Empty content received")
+
+                            elif response.status in RETRY_STATUSES:
+                                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                                print(f"⏳ HTTP {response.status} - backing off")
+                                metrics.count("api_retries_total", status=response.status)
+                                if response.status == 429:
+                                    self.bucket.pause(self.backoff(attempt, retry_after))
+
+                            else:
+                                print(f"❌ HTTP Error {response.status}: {await response.text()}")
+                                metrics.count("api_failures_total")
+                                return None
+
+            except asyncio.TimeoutError:
+                print("⏳ Request timeout - retrying...")
+                metrics.count("api_retries_total", status="timeout")
+
+            except (aiohttp.ClientError, ValueError, KeyError) as e:
+                print(f"❌ Request error: {e}")
+
+            if attempt < self.retries - 1:
+                await asyncio.sleep(self.backoff(attempt, retry_after))
+
+        metrics.count("api_failures_total")
+        return None
+
+    async def stream_summary(self, article_text, max_tokens=200):
+        """
+        Yields the summary of one article piece by piece as the model writes it
+        Failed attempts are retried like summarize() as long as nothing has been
+        yielded yet. Raises OpenRouterError when every attempt failed, the request
+        was refused, or the stream broke off after it started
+        """
+        payload = build_payload(article_text, max_tokens, stream=True)
+
+        for attempt in range(self.retries):
+            retry_after = None
+            started = False
+            await self.bucket.acquire()
+
+            try:
+                async with self._in_flight:
+                    with metrics.span("api_request"):
+                        start = time.perf_counter()
+                        async with self.session.post(self.base_url, json=payload) as response:
+                            if response.status == 200:
+                                async for data in iter_sse_events(response.content):
+                                    if data == "[DONE]":
+                                        break
+                                    event = json.loads(data)
+                                    if event.get("error"):
+                                        raise ValueError(event["error"].get("message", event["error"]))
+                                    usage = event.get("usage") or {}
+                                    metrics.count("api_completion_tokens_total", usage.get("completion_tokens", 0))
+                                    choices = event.get("choices") or []
+                                    piece = (choices[0].get("delta") or {}).get("content") if choices else None
+                                    if piece:
+                                        if not started:
+                                            started = True
+                                            metrics.observe("api_first_token_seconds", time.perf_counter() - start)
+                                        yield piece
+                                if started:
+                                    return
+                                print("⚠️ Empty content received")
+
+                            elif response.status in RETRY_STATUSES:
+                                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                                print(f"⏳ HTTP {response.status} - backing off")
+                                metrics.count("api_retries_total", status=response.status)
+                                if response.status == 429:
+                                    self.bucket.pause(self.backoff(attempt, retry_after))
+
+                            else:
+                                metrics.count("api_failures_total")
+                                raise OpenRouterError(f"HTTP {response.status}: {await response.text()}")
+
+            except asyncio.TimeoutError as e:
+                if started:
+                    metrics.count("api_failures_total")
+                    raise OpenRouterError("stream timed out, summary cut short") from e
+                print("⏳ Request timeout - retrying...")
+                metrics.count("api_retries_total", status="timeout")
+
+            except (aiohttp.ClientError, ValueError, KeyError) as e:
+                if started:
+                    metrics.count("api_failures_total")
+                    raise OpenRouterError(f"stream broke off: {e}") from e
+                print(f"❌ Request error: {e}")
+
+            if attempt < self.retries - 1:
+                await asyncio.sleep(self.backoff(attempt, retry_after))
+
+        metrics.count("api_failures_total")
+        raise OpenRouterError(f"no summary after {self.retries} attempts")
+
+    async def summarize_many(self, texts, max_tokens=200):
+        """Summaries for all texts, in input order; failed ones are None"""
+        return await asyncio.gather(*(self.summarize(text, max_tokens) for text in texts))
+
+
+def summarize_batch(texts, api_key, max_tokens=200, **client_options):
+    """Synchronous entry point: summarize all texts concurrently and wait for the results"""
+    async def run():
+        async with OpenRouterClient(api_key, **client_options) as client:
+            return await client.summarize_many(texts, max_tokens)
+
+    return asyncio.run(run())
+
+
+def stream_summary(text, api_key, max_tokens=200, **client_options):
+    """
+    Synchronous generator over the pieces of one streamed summary
+    The request runs on its own event loop in a background thread, so this can be
+    consumed from plain synchronous code such as a Streamlit script
+    """
+    pieces = queue.Queue()
+    done = object()
+
+    def run():
+        async def consume():
+            async with OpenRouterClient(api_key, **client_options) as client:
+                async for piece in client.stream_summary(text, max_tokens):
+                    pieces.put(piece)
+        try:
+            asyncio.run(consume())
+        except Exception as e:
+            pieces.put(e)
+        finally:
+            pieces.put(done)
+
+    threading.Thread(target=run, daemon=True).start()
+    while True:
+        item = pieces.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
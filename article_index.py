@@ -0,0 +1,277 @@
+import email.utils
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from article_record import Article
+from article_store import get_store, ARTICLES_STORE, SUMMARIES_STORE
+from summary_cache import normalize_content
+
+ARTICLE_INDEX_FILE = "article_index.db"
+PAGE_SIZE = 20
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid')
+
+# Texts stored in the summary field when no summary could be made: by the model pipeline,
+# the OpenRouter integration, and as "Error: ..." messages by the router, worker and UI
+FAILED_SUMMARIES = ("Content too short", "No summary available", "Summary generation failed.",
+                    "All chunks failed to summarize.", "Could not chunk article for summarization.",
+                    "Summarization failed after multiple attempts")
+FAILURE_PREFIX = "Error:"
+
+# SQL condition for rows with an actual summary; rows indexed before failures were filtered may hold one
+HAS_SUMMARY = ("articles.summary != '' AND articles.summary NOT LIKE '" + FAILURE_PREFIX + "%' AND "
+               "articles.summary NOT IN (" + ", ".join(f"'{text}'" for text in FAILED_SUMMARIES) + ")")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    canonical_url TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    title TEXT NOT NULL,
+    source TEXT,
+    published TEXT,
+    published_ts REAL,
+    content TEXT,
+    summary TEXT NOT NULL DEFAULT '',
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_content_hash ON articles (content_hash);
+CREATE INDEX IF NOT EXISTS articles_published ON articles (published_ts);
+CREATE INDEX IF NOT EXISTS articles_source ON articles (source);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, content, summary, content='articles', content_rowid='id'
+);
+
+CREATE TABLE IF NOT EXISTS backfills (store TEXT PRIMARY KEY, finished_at REAL NOT NULL);
+
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, content, summary)
+    VALUES (new.id, new.title, new.content, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, content, summary)
+    VALUES ('delete', old.id, old.title, old.content, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, content, summary)
+    VALUES ('delete', old.id, old.title, old.content, old.summary);
+    INSERT INTO articles_fts (rowid, title, content, summary)
+    VALUES (new.id, new.title, new.content, new.summary);
+END;
+"""
+
+COLUMNS = ", ".join(f"articles.{column}" for column in
+                    ("url", "content_hash", "title", "source", "published", "content", "summary"))
+
+
+def canonical_url(url):
+    # Normalized URL: lower-case scheme and host, no fragment, tracking parameters or trailing slash
+    parts = urlsplit((url or "").strip())
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith(TRACKING_PARAMS))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+def content_hash(content):
+    return hashlib.sha256(normalize_content(content).encode("utf-8")).hexdigest()
+
+
+def is_summary(summary):
+    # True for an actual summary, False for none or a failure placeholder
+    return bool(summary and summary.strip()) and not summary.startswith(FAILURE_PREFIX) \
+        and summary not in FAILED_SUMMARIES
+
+
+def published_timestamp(published):
+    # Seconds since the epoch for an RSS date, or None if it cannot be parsed
+    try:
+        return email.utils.parsedate_to_datetime(published).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class ArticleIndex:
+    """
+    SQLite index of every article ever fetched, with its summary
+    Articles are unique by canonical URL and also looked up by content hash, so ingest
+    dedup is an indexed lookup. Title, content and summary are full-text searchable
+    through FTS5, and listings are paginated in SQL
+    """
+
+    def __init__(self, filename=ARTICLE_INDEX_FILE):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    def contains(self, article):
+        # True if an article with the same canonical URL or the same content is indexed
+        with self._lock:
+            return self._find(article) is not None
+
+    def add(self, article):
+        # Index an article; returns False if it (or the same content under another URL) is known.
+        # A known article gets its summary updated when a new one is provided; failure
+        # placeholders are not recorded as summaries.
+        with self._lock:
+            added = self._add(article)
+            self._db.commit()
+            return added
+
+    def add_many(self, articles):
+        # Index several articles in one transaction; returns how many were new
+        with self._lock:
+            added = sum(self._add(article) for article in articles)
+            self._db.commit()
+            return added
+
+    def backfill(self, store):
+        # Index every record of a JSONL store once, for stores written before the index existed;
+        # later records reach the index as they are saved. Returns how many articles were new.
+        name = os.path.basename(store.path)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self._db.execute("SELECT 1 FROM backfills WHERE store = ?", (name,)).fetchone():
+                    self._db.rollback()
+                    return 0
+                added = sum(self._add(article) for article in Article.from_dicts(store))
+                self._db.execute("INSERT INTO backfills (store, finished_at) VALUES (?, ?)",
+                                 (name, time.time()))
+                self._db.commit()
+            except Exception:
+                self._db.rollback()
+                raise
+        return added
+
+    def get(self, url):
+        with self._lock:
+            row = self._db.execute(f"SELECT {COLUMNS} FROM articles WHERE articles.canonical_url = ?",
+                                   (canonical_url(url),)).fetchone()
+        return dict(row) if row else None
+
+    def summarized(self, urls):
+        # Canonical URLs, among the given ones, of indexed articles that have a summary
+        urls = list({canonical_url(url) for url in urls})
+        found = set()
+        with self._lock:
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT canonical_url FROM articles WHERE {HAS_SUMMARY} "
+                    f"AND canonical_url IN ({', '.join('?' * len(chunk))})", chunk)
+                found.update(row[0] for row in rows)
+        return found
+
+    def count(self, query=None, source=None, has_summary=None):
+        tables, where, params = self._filters(query, source, has_summary)
+        with self._lock:
+            return self._db.execute(
+                f"SELECT COUNT(*) FROM {tables} {where}", params).fetchone()[0]
+
+    def page(self, page=0, page_size=PAGE_SIZE, query=None, source=None, has_summary=None,
+             order_by='published', descending=True):
+        # One page of articles matching the filters. With a search query and no explicit
+        # ordering, results are ranked by relevance.
+        tables, where, params = self._filters(query, source, has_summary)
+        direction = "DESC" if descending else "ASC"
+        orders = {
+            'published': f"articles.published_ts IS NULL, articles.published_ts {direction}",
+            'fetched': f"articles.fetched_at {direction}",
+            'title': f"articles.title COLLATE NOCASE {direction}",
+            'source': f"articles.source COLLATE NOCASE {direction}, articles.published_ts DESC",
+            'relevance': "bm25(articles_fts)",
+        }
+        if order_by == 'relevance' and not query:
+            order_by = 'published'
+
+        sql = (f"SELECT {COLUMNS} FROM {tables} {where} "
+               f"ORDER BY {orders[order_by]} LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._db.execute(sql, params + [page_size, page * page_size]).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, query, page=0, page_size=PAGE_SIZE):
+        return self.page(page, page_size, query=query, order_by='relevance')
+
+    def sources(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT source FROM articles WHERE source IS NOT NULL ORDER BY source")
+            return [row[0] for row in rows]
+
+    def _find(self, article):
+        url = canonical_url(article.get('url'))
+        if not (article.get('content') or '').strip():
+            return self._db.execute(
+                "SELECT id, summary FROM articles WHERE canonical_url = ?", (url,)).fetchone()
+        return self._db.execute(
+            "SELECT id, summary FROM articles WHERE canonical_url = ? OR content_hash = ? LIMIT 1",
+            (url, content_hash(article['content']))).fetchone()
+
+    def _add(self, article):
+        existing = self._find(article)
+        summary = article.get('summary') if is_summary(article.get('summary')) else ''
+
+        if existing is not None:
+            if summary and summary != existing['summary']:
+                self._db.execute("UPDATE articles SET summary = ? WHERE id = ?",
+                                 (summary, existing['id']))
+            return False
+
+        published = article.get('published')
+        self._db.execute(
+            "INSERT INTO articles (canonical_url, url, content_hash, title, source, published, "
+            "published_ts, content, summary, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (canonical_url(article.get('url')), article.get('url', ''),
+             content_hash(article.get('content', '')),
+             article.get('title', ''), article.get('source'),
+             str(published) if published else None, published_timestamp(published),
+             article.get('content', ''), summary, time.time()))
+        return True
+
+    def _filters(self, query, source, has_summary):
+        # FROM and WHERE clauses, with their parameters, for the given filters
+        tables, clauses, params = "articles", [], []
+        if query:
+            tables = "articles JOIN articles_fts ON articles_fts.rowid = articles.id"
+            clauses.append("articles_fts MATCH ?")
+            params.append(fts_query(query))
+        if source:
+            clauses.append("articles.source = ?")
+            params.append(source)
+        if has_summary is not None:
+            clauses.append(HAS_SUMMARY if has_summary else f"NOT ({HAS_SUMMARY})")
+        return tables, ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def fts_query(text):
+    # Turn free text into an FTS5 query matching all words as prefixes, safe from syntax errors
+    words = ["".join(ch for ch in word if ch.isalnum()) for word in text.split()]
+    return " ".join(f'"{word}"*' for word in words if word) or '""'
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_article_index():
+    # The article index of this process: scraping, summarizing and the UI pages all
+    # query one connection, serialized by its lock
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = ArticleIndex()
+            # Articles first, so the summaries then land on their rows
+            for path in (ARTICLES_STORE, SUMMARIES_STORE):
+                _shared_index.backfill(get_store(path))
+        return _shared_index
@@ -0,0 +1,93 @@
+from collections.abc import MutableMapping
+
+from content_store import get_content_store
+
+
+class Article(MutableMapping):
+    """
+    Compact article record with its body kept in the content store
+    Behaves like the article dictionaries it replaces: article['content'] loads
+    the body on demand (without holding on to it), assigning it stores the body
+    and keeps only its reference, and fields that are None count as missing.
+    There is no per-instance __dict__, so a record costs a few hundred bytes
+    however long its article is
+    """
+
+    __slots__ = ('title', 'url', 'published', 'source', 'authors', 'summary', 'duplicate_of',
+                 'content_ref', 'content_length', 'processed_at')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, None)
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        # Record for an article dictionary (or a stored record); articles pass through unchanged
+        return cls.from_dicts([data])[0]
+
+    @classmethod
+    def from_dicts(cls, records):
+        # Records for several dictionaries, storing all their bodies in one transaction
+        records = list(records)
+        bodies = [r.get('content') for r in records if not isinstance(r, cls) and r.get('content') is not None]
+        refs = iter(get_content_store().put_many(bodies)) if bodies else iter(())
+        articles = []
+        for record in records:
+            if isinstance(record, cls):
+                articles.append(record)
+                continue
+            article = cls(**{key: value for key, value in record.items() if key in cls.__slots__})
+            if record.get('content') is not None:
+                article.content_ref, article.content_length = next(refs), len(record['content'])
+            articles.append(article)
+        return articles
+
+    def to_record(self):
+        # JSON-ready dictionary referencing the body instead of copying it
+        return {name: getattr(self, name) for name in self.__slots__ if getattr(self, name) is not None}
+
+    def __getitem__(self, key):
+        if key == 'content':
+            content = get_content_store().get(self.content_ref) if self.content_ref else None
+        elif key in self.__slots__:
+            content = getattr(self, key)
+        else:
+            content = None
+        if content is None:
+            raise KeyError(key)
+        return content
+
+    def __setitem__(self, key, value):
+        if key == 'content':
+            self.content_ref = get_content_store().put(value) if value is not None else None
+            self.content_length = len(value) if value is not None else None
+        elif key in self.__slots__:
+            setattr(self, key, value)
+        else:
+            raise KeyError(f"Article records have no field {key!r}")
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self[key] = None
+
+    def __contains__(self, key):
+        # Answered from the reference alone, without loading the body
+        if key == 'content':
+            return self.content_ref is not None
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def __iter__(self):
+        for name in self.__slots__:
+            if getattr(self, name) is not None:
+                yield name
+        if self.content_ref is not None:
+            yield 'content'
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Article(title={self.title!r}, url={self.url!r})"
@@ -0,0 +1,299 @@
+import json
+import os
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+import metrics
+
+ARTICLES_STORE = "astronomy_articles.jsonl"
+SUMMARIES_STORE = "astronomy_summaries_falconsai.jsonl"
+# Whole-file JSON lists the stores replaced, imported when a store is first created
+LEGACY_JSON = {
+    ARTICLES_STORE: "astronomy_articles.json",
+    SUMMARIES_STORE: "astronomy_summaries_falconsai.json",
+}
+
+COMPACT_EVERY = 1000    # Records appended since the last compaction that trigger the next one
+OFFSET = struct.Struct("<Q")
+
+
+class FileLock:
+    """
+    Exclusive lock on `path` shared by every thread and process that opens it
+
+    Held around each append, read and compaction of a store, so offsets are
+    computed against the file as it is on disk, never against one that another
+    process is still writing or rewriting
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            self._file = open(self.path, "a+b")
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        except BaseException:
+            if self._file:
+                self._file.close()
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._thread_lock.release()
+
+
+class JsonlStore:
+    """
+    Append-only JSON Lines store of article/summary records
+
+    Every record is one line of `path`; `path + ".idx"` holds the byte offset of
+    each line as a fixed-width integer, so record i is found with two seeks and the
+    latest N records are read without parsing the rest of the history. Appends are
+    flushed and fsynced; on open, a torn last line or a stale index left by a crash
+    is repaired. Records sharing a key (the URL by default) supersede each other,
+    and compaction rewrites the file with only the latest record per key. The
+    record count after the last compaction is kept in `path + ".compacted"`, so
+    appends from every process that writes the store count towards the next one.
+    The UI, the summary worker and the feed poller all write the same store, so
+    appends, reads and compaction hold an exclusive lock on `path + ".lock"`
+    """
+
+    def __init__(self, path, key='url', compact_every=COMPACT_EVERY, legacy_json=None):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.compacted_path = path + ".compacted"
+        self.key = key
+        self.compact_every = compact_every
+        self._lock = FileLock(path + ".lock")
+
+        if legacy_json and not os.path.exists(path) and os.path.exists(legacy_json):
+            self._import_legacy(legacy_json)
+        with self._lock:
+            self._repair()
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+    def _count(self):
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path) // OFFSET.size
+
+    def append(self, record):
+        self.extend([record])
+
+    def extend(self, records):
+        # Append records in one write; costs O(len(records)) regardless of store size
+        lines = [json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n" for r in records]
+        if not lines:
+            return
+
+        with self._lock, metrics.span("store_write", store=os.path.basename(self.path)):
+            with open(self.path, "ab") as data, open(self.index_path, "ab") as index:
+                offset = data.seek(0, os.SEEK_END)
+                offsets = []
+                for line in lines:
+                    offsets.append(OFFSET.pack(offset))
+                    offset += len(line)
+
+                data.write(b"".join(lines))
+                data.flush()
+                os.fsync(data.fileno())
+                index.write(b"".join(offsets))
+                index.flush()
+
+            if self.compact_every and self._count() - self._compacted_count() >= self.compact_every:
+                self._compact()
+
+    def get(self, i):
+        # Record number i (negative indices count from the end)
+        with self._lock:
+            count = self._count()
+            if i < 0:
+                i += count
+            if not 0 <= i < count:
+                raise IndexError("record index out of range")
+
+            with open(self.index_path, "rb") as index, open(self.path, "rb") as data:
+                index.seek(i * OFFSET.size)
+                data.seek(OFFSET.unpack(index.read(OFFSET.size))[0])
+                return json.loads(data.readline())
+
+    def latest(self, n):
+        # The newest n records, newest last, reading only their lines
+        if n <= 0:
+            return []
+        with self._lock:
+            count = self._count()
+            if count == 0:
+                return []
+            start = max(0, count - n)
+
+            with open(self.index_path, "rb") as index, open(self.path, "rb") as data:
+                index.seek(start * OFFSET.size)
+                data.seek(OFFSET.unpack(index.read(OFFSET.size))[0])
+                return [json.loads(line) for line in data if line.strip()]
+
+    def latest_unique(self, n):
+        # The newest n records with distinct keys, newest last
+        records = {}
+        for record in reversed(self.latest(n)):
+            records.setdefault(record.get(self.key), record)
+        return list(reversed(list(records.values())))
+
+    def __iter__(self):
+        with self._lock:
+            records = list(self._records())
+        return iter(records)
+
+    def _records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as data:
+            for line in data:
+                if line.strip():
+                    yield json.loads(line)
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        # Rewrite the store keeping only the latest record per key, in order of last write
+        latest = {}
+        for record in self._records():
+            key = record.get(self.key)
+            latest.pop(key, None)
+            latest[key] = record
+
+        tmp_path = self.path + ".tmp"
+        offsets = []
+        with open(tmp_path, "wb") as data:
+            for record in latest.values():
+                offsets.append(OFFSET.pack(data.tell()))
+                data.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+            data.flush()
+            os.fsync(data.fileno())
+
+        with open(self.index_path + ".tmp", "wb") as index:
+            index.write(b"".join(offsets))
+
+        # Drop the old index first: a crash between the two renames then leaves
+        # the new data file with no index, which _repair rebuilds from scratch
+        os.remove(self.index_path)
+        os.replace(tmp_path, self.path)
+        os.replace(self.index_path + ".tmp", self.index_path)
+        with open(self.compacted_path, "w", encoding="utf-8") as f:
+            f.write(str(len(offsets)))
+
+    def _compacted_count(self):
+        # Records in the store right after its last compaction; 0 if it never was compacted
+        try:
+            with open(self.compacted_path, "r", encoding="utf-8") as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return 0
+
+    def _repair(self):
+        # Drop a torn trailing line and bring the index in line with the data file;
+        # called with the lock held
+        if not os.path.exists(self.path):
+            open(self.path, "wb").close()
+
+        with open(self.path, "rb+") as data:
+            size = data.seek(0, os.SEEK_END)
+            if size:
+                data.seek(size - 1)
+                if data.read(1) != b"\n":
+                    data.seek(max(0, size - (1 << 20)))
+                    tail = data.read()
+                    size = size - len(tail) + tail.rfind(b"\n") + 1 if b"\n" in tail else 0
+                    data.truncate(size)
+
+        with open(self.index_path, "ab+") as index:
+            index.seek(0)
+            raw = index.read()
+            raw_offsets = [OFFSET.unpack_from(raw, i)[0] for i in range(0, len(raw) - len(raw) % OFFSET.size, OFFSET.size)]
+            offsets = [o for o in raw_offsets if o < size]
+
+            with open(self.path, "rb") as data:
+                # An index that does not point at the start of every line belongs to
+                # another version of the data file; rebuild it
+                if not self._offsets_match(offsets, data):
+                    offsets = []
+
+                # Index any lines written after the last indexed one
+                data.seek(0)
+                if offsets:
+                    data.seek(offsets[-1])
+                    data.readline()
+                position = data.tell()
+                for line in data:
+                    offsets.append(position)
+                    position += len(line)
+
+            if len(offsets) * OFFSET.size != len(raw) or offsets != raw_offsets:
+                index.truncate(0)
+                index.write(b"".join(OFFSET.pack(o) for o in offsets))
+
+    @staticmethod
+    def _offsets_match(offsets, data):
+        # Whether offsets rise strictly and each one starts a line of data
+        previous = -1
+        for offset in offsets:
+            if offset <= previous:
+                return False
+            if offset:
+                data.seek(offset - 1)
+                if data.read(1) != b"\n":
+                    return False
+            previous = offset
+        return True
+
+    def _import_legacy(self, legacy_json):
+        # One-time migration of a whole-file JSON list into the store
+        try:
+            with open(legacy_json, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not import {legacy_json}: {e}")
+            return
+        print(f"Importing {len(records)} records from {legacy_json} into {self.path}")
+        self.extend(records)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path, legacy_json=None):
+    # One store per path in this process, so the legacy import and repair run once
+    # per process rather than on every save
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = JsonlStore(path, legacy_json=legacy_json or LEGACY_JSON.get(path))
+        return _stores[path]
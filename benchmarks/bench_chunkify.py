@@ -0,0 +1,77 @@
+"""
+Micro-benchmark: the linear chunkify against the old sentence-by-sentence re-tokenizing one
+Usage: python benchmarks/bench_chunkify.py [tokenizer_dir]
+"""
+import sys
+import os
+import json
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transformers import AutoTokenizer
+from news_summarize import chunkify
+
+ARTICLES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "astronomy_articles.json")
+
+
+def legacy_chunkify(text, tokenizer, max_tokens=400):
+    # The previous implementation, kept here as the baseline: re-tokenizes the growing chunk per sentence
+    sentences = text.split('.')
+    chunks = []
+    current_chunk = ""
+
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+
+        test_chunk = current_chunk + ". " + sentence if current_chunk else sentence
+        tokens = tokenizer.tokenize(test_chunk)
+
+        if len(tokens) <= max_tokens:
+            current_chunk = test_chunk
+        else:
+            if current_chunk:
+                chunks.append(current_chunk)
+            current_chunk = sentence
+
+    if current_chunk:
+        chunks.append(current_chunk)
+
+    return chunks
+
+
+def best_time(func, repeat=5):
+    # Best wall time of several runs, in seconds
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    tokenizer_dir = sys.argv[1] if len(sys.argv) > 1 else "local_falconsai_model"
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir)
+
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        contents = [a['content'] for a in json.load(f) if a.get('content')]
+
+    longest = max(contents, key=len)
+    inputs = {
+        "longest article": longest,
+        "all articles joined": "\n\n".join(contents),
+    }
+
+    print(f"{'input':<22}{'chars':>9}{'legacy (s)':>13}{'linear (s)':>13}{'speedup':>10}")
+    for name, text in inputs.items():
+        legacy = best_time(lambda: legacy_chunkify(text, tokenizer), repeat=1 if len(text) > 20000 else 3)
+        linear = best_time(lambda: chunkify(text, tokenizer))
+        print(f"{name:<22}{len(text):>9}{legacy:>13.4f}{linear:>13.4f}{legacy / linear:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
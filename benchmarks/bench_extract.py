@@ -0,0 +1,63 @@
+"""
+Benchmark: HTML extraction throughput, newspaper3k in threads vs the process pool vs the lxml fast path
+Usage: python benchmarks/bench_extract.py [copies]
+The recorded article pages are parsed `copies` times each (default 20). For the
+fast path they are given the body container and URL of a nasa.gov page.
+"""
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from news_scrape import extract_article, get_extract_pool, EXTRACT_WORKERS, MAX_WORKERS
+from fixture_server import DATA_DIR
+
+ARTICLES_DIR = os.path.join(DATA_DIR, "articles")
+
+
+def load_pages(copies):
+    pages = []
+    for name in sorted(os.listdir(ARTICLES_DIR)):
+        with open(os.path.join(ARTICLES_DIR, name), "r", encoding="utf-8") as f:
+            pages.append((f.read(), f"https://example.com/{name[:-5]}/"))
+    return pages * copies
+
+
+def as_nasa(pages):
+    return [(html.replace('class="article-body"', 'class="entry-content"'), "https://www.nasa.gov" + url[19:])
+            for html, url in pages]
+
+
+def run(executor, pages):
+    start = time.perf_counter()
+    results = list(executor.map(extract_article, *zip(*pages)))
+    return time.perf_counter() - start, results
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    pages = load_pages(copies)
+
+    workers = EXTRACT_WORKERS or 1  # Scrapes parse in threads on one core; measure the pool anyway
+    pool = get_extract_pool(workers)
+    run(pool, pages[:workers * 2])  # let every worker start and import its parsers
+
+    timings = {}
+    with ThreadPoolExecutor(MAX_WORKERS) as threads:
+        timings['newspaper, threads'], _ = run(threads, pages)
+        timings['fast path, threads'], fast = run(threads, as_nasa(pages))
+    timings[f'newspaper, {workers} processes'], _ = run(pool, pages)
+    timings[f'fast path, {workers} processes'], _ = run(pool, as_nasa(pages))
+
+    print(f"{len(pages)} pages, {sum(extractor == 'fast' for _, _, extractor in fast)} on the fast path")
+    baseline = timings['newspaper, threads']
+    print(f"{'extraction':<28}{'time (s)':>10}{'pages/s':>9}{'speedup':>9}")
+    for name, elapsed in timings.items():
+        print(f"{name:<28}{elapsed:>10.2f}{len(pages) / elapsed:>9.0f}{baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: model calls, time and summary agreement with and without the extractive pre-filter
+Usage: python benchmarks/bench_extractive.py [copies]
+The bundled articles are used as they are, plus one long article made of all of
+them repeated `copies` times (default 3). Summaries with the pre-filter are
+compared with the plain map-reduce ones by ROUGE-L F1. The summary cache is bypassed.
+"""
+import sys
+import os
+import json
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import news_summarize
+from news_summarize import get_local_model, run_summarization
+from parity_backends import rouge_l
+
+ARTICLES_FILE = os.path.join(ROOT, "astronomy_articles.json")
+
+
+class CountingSummarizer:
+    # Wraps a summarization pipeline and counts the texts sent through it
+    def __init__(self, summarizer):
+        self.summarizer = summarizer
+        self.texts = 0
+
+    def __call__(self, texts, **params):
+        self.texts += 1 if isinstance(texts, str) else len(texts)
+        return self.summarizer(texts, **params)
+
+
+def run(contents, summarizer, tokenizer, extractive_tokens):
+    news_summarize.EXTRACTIVE_TOKENS = extractive_tokens
+    counting = CountingSummarizer(summarizer)
+    start = time.perf_counter()
+    summaries, _ = run_summarization(contents, counting, tokenizer)
+    return summaries, counting.texts, time.perf_counter() - start
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        contents = [a['content'] for a in json.load(f) if a.get('content')]
+    contents.append(" ".join(contents) * copies)
+
+    summarizer, tokenizer = get_local_model()
+    budget = news_summarize.EXTRACTIVE_TOKENS or news_summarize.MAX_INPUT_TOKENS
+
+    full, full_calls, full_time = run(contents, summarizer, tokenizer, 0)
+    extracted, calls, elapsed = run(contents, summarizer, tokenizer, budget)
+
+    scores = [rouge_l(a, b) for a, b in zip(full, extracted)]
+    print(f"{len(contents)} articles, extractive budget {budget} tokens")
+    print(f"{'':<14}{'model calls':>12}{'time (s)':>10}")
+    print(f"{'map-reduce':<14}{full_calls:>12}{full_time:>10.1f}")
+    print(f"{'extractive':<14}{calls:>12}{elapsed:>10.1f}")
+    print(f"{full_calls / max(calls, 1):.1f}x fewer model calls, {full_time / elapsed:.1f}x faster")
+    print(f"ROUGE-L F1 against map-reduce: mean {sum(scores) / len(scores):.3f}, "
+          f"min {min(scores):.3f}")
+
+
+if __name__ == "__main__":
+    main()
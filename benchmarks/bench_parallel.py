@@ -0,0 +1,45 @@
+"""
+Benchmark: multi-process summarization throughput from 1 to N worker processes
+Usage: python benchmarks/bench_parallel.py [max_workers] [copies]
+Each bundled article is repeated `copies` times (default 4) to make the batch
+big enough to keep every worker busy. The summary cache is bypassed.
+"""
+import sys
+import os
+import json
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from parallel_summarize import summarize_parallel
+
+ARTICLES_FILE = os.path.join(ROOT, "astronomy_articles.json")
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        contents = [a['content'] for a in json.load(f) if a.get('content')] * copies
+
+    counts = sorted({1, max_workers} | {n for n in (2, 4, 8, 16) if n < max_workers})
+    cores = os.cpu_count() or 1
+    print(f"{len(contents)} articles, {cores} cores")
+    print(f"{'workers':>8}{'threads':>9}{'time (s)':>10}{'art/s':>8}{'speedup':>9}")
+
+    baseline = None
+    for workers in counts:
+        threads = max(1, cores // workers)
+        start = time.perf_counter()
+        summarize_parallel(contents, workers=workers, threads_per_worker=threads, use_cache=False)
+        elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        print(f"{workers:>8}{threads:>9}{elapsed:>10.1f}{len(contents) / elapsed:>8.2f}"
+              f"{baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: cold import time of the entry-point modules
+Usage: python benchmarks/bench_startup.py [runs]
+Every module is imported in a fresh interpreter `runs` times (default 5) and the
+median wall time is reported, together with any heavy ML package the import
+pulled in. None of them should need transformers or torch until a summary is
+actually requested.
+"""
+import sys
+import os
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['news_scrape', 'article_store', 'article_index', 'news_summarize', 'summary_worker', 'web_ui']
+HEAVY = ['torch', 'transformers', 'optimum', 'onnxruntime']
+TARGET_SECONDS = 1.0
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def import_time(module):
+    # Import time of module in a fresh interpreter and the heavy packages it loaded
+    result = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    elapsed, _, heavy = result.stdout.strip().splitlines()[-1].partition(" ")
+    return float(elapsed), heavy
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # One throwaway import each so bytecode compilation is not timed
+    for module in MODULES:
+        import_time(module)
+
+    print(f"{'module':<16}{'median (s)':>11}{'max (s)':>9}  heavy imports")
+    for module in MODULES:
+        samples = [import_time(module) for _ in range(runs)]
+        times = [elapsed for elapsed, _ in samples]
+        heavy = samples[-1][1] or "-"
+        median = statistics.median(times)
+        flag = "" if median < TARGET_SECONDS else "  SLOW"
+        print(f"{module:<16}{median:>11.3f}{max(times):>9.3f}  {heavy}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: time to first token vs. time to the whole summary, streamed and not
+Usage: python benchmarks/bench_streaming.py [articles]
+OpenRouter is the local mock, streaming one word every API_TOKEN_DELAY seconds;
+the local model is the stand-in, writing one token every LOCAL_TOKEN_DELAY seconds.
+Runs in a scratch directory, so the summary cache starts empty.
+"""
+import sys
+import os
+import json
+import time
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "api_integration"))
+
+from mock_openrouter import MockOpenRouter
+from standin_model import load_standin_model
+
+ARTICLES_FILE = os.path.join(ROOT, "astronomy_articles.json")
+API_LATENCY = 0.3           # Seconds before the mock sends its first word
+API_TOKEN_DELAY = 0.02      # Seconds between streamed words
+LOCAL_TOKEN_DELAY = 0.01    # Seconds the stand-in model takes per generated token
+
+
+def time_stream(summarize):
+    # Seconds to the first piece summarize() produces and to the last; a plain
+    # list arrives all at once
+    start = time.perf_counter()
+    first = None
+    for _ in summarize():
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def report(label, timings):
+    first = sum(t[0] for t in timings) / len(timings)
+    total = sum(t[1] for t in timings) / len(timings)
+    print(f"{label:<28}{first:>12.3f}{total:>12.3f}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        contents = [a['content'] for a in json.load(f) if a.get('content')][:count]
+
+    os.chdir(tempfile.mkdtemp(prefix="bench_streaming_"))
+    from news_summarize import stream_summary, summarize_articles_batched
+    from news_summarizer_api import llama33_summarize_stream, llama33_summarize_many
+    from summary_cache import get_summary_cache
+
+    print(f"{len(contents)} articles, mean seconds")
+    print(f"{'path':<28}{'first token':>12}{'total':>12}")
+
+    with MockOpenRouter(latency=API_LATENCY, token_delay=API_TOKEN_DELAY) as server:
+        os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+        options = {'base_url': server.url, 'requests_per_minute': 6000}
+        report("openrouter, whole",
+               [time_stream(lambda: llama33_summarize_many([text], **options)) for text in contents])
+        get_summary_cache().clear()
+        report("openrouter, streamed",
+               [time_stream(lambda: llama33_summarize_stream(text, **options)) for text in contents])
+
+    get_summary_cache().clear()
+    summarizer, tokenizer = load_standin_model(contents)
+    summarizer.token_delay = LOCAL_TOKEN_DELAY
+    report("local, whole",
+           [time_stream(lambda: summarize_articles_batched([text], summarizer, tokenizer, use_cache=False))
+            for text in contents])
+    report("local, streamed",
+           [time_stream(lambda: stream_summary(text, summarizer, tokenizer)) for text in contents])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Offline fixtures for the benchmarks: recorded RSS feeds and article pages served over local HTTP
+Usage: python benchmarks/fixture_server.py record   (rebuilds benchmarks/data from astronomy_articles.json)
+       python benchmarks/fixture_server.py [port]    (serves the fixtures until interrupted)
+Feed items link to `{base}/articles/<slug>`; the server fills in its own address,
+answers conditional feed requests with 304 and can add a fixed latency to every request.
+"""
+import sys
+import os
+import json
+import hashlib
+import threading
+import time
+from html import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARTICLES_FILE = os.path.join(ROOT, "astronomy_articles.json")
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+BASE_PLACEHOLDER = "{base}"
+
+
+def slug(url):
+    return urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def article_html(article):
+    # Page layout similar to the real sites: navigation and footer around the article body
+    paragraphs = "\n".join(f"    <p>{escape(p.strip())}</p>" for p in article['content'].split("\n\n") if p.strip())
+    authors = "".join(f'<meta name="author" content="{escape(a)}">' for a in article.get('authors', [])[:1])
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{escape(article['title'])}</title>
+{authors}
+<meta property="article:published_time" content="{escape(article.get('published') or '')}">
+</head>
+<body>
+<header><nav><a href="/">Home</a> <a href="/news">News</a> <a href="/subscribe">Subscribe</a></nav></header>
+<article>
+  <h1>{escape(article['title'])}</h1>
+  <div class="article-body">
+{paragraphs}
+  </div>
+</article>
+<footer><p>Sign up for our newsletter.</p><p>All rights reserved.</p></footer>
+</body>
+</html>
+"""
+
+
+def feed_xml(source, articles):
+    items = "\n".join(f"""  <item>
+    <title>{escape(a['title'])}</title>
+    <link>{BASE_PLACEHOLDER}/articles/{slug(a['url'])}</link>
+    <guid>{escape(a['url'])}</guid>
+    <pubDate>{escape(a.get('published') or '')}</pubDate>
+  </item>""" for a in articles)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+<channel>
+  <title>{escape(source)}</title>
+  <link>{BASE_PLACEHOLDER}/</link>
+  <description>Recorded fixture feed</description>
+{items}
+</channel>
+</rss>
+"""
+
+
+def record_fixtures(articles_file=ARTICLES_FILE, data_dir=DATA_DIR):
+    """Writes one feed per source and one page per article from the saved articles"""
+    with open(articles_file, "r", encoding="utf-8") as f:
+        articles = [a for a in json.load(f) if a.get('content')]
+
+    sources = {}
+    for article in articles:
+        sources.setdefault(article.get('source') or "Unknown", []).append(article)
+
+    os.makedirs(os.path.join(data_dir, "feeds"), exist_ok=True)
+    os.makedirs(os.path.join(data_dir, "articles"), exist_ok=True)
+    for n, (source, items) in enumerate(sources.items()):
+        with open(os.path.join(data_dir, "feeds", f"feed{n}.xml"), "w", encoding="utf-8") as f:
+            f.write(feed_xml(source, items))
+    for article in articles:
+        with open(os.path.join(data_dir, "articles", f"{slug(article['url'])}.html"), "w",
+                  encoding="utf-8") as f:
+            f.write(article_html(article))
+    print(f"✅ Recorded {len(sources)} feeds and {len(articles)} articles in {data_dir}")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in ("feeds", "articles"):
+            self.send_error(404)
+            return
+        kind, name = parts
+        path = os.path.join(server.data_dir, kind, name + (".xml" if kind == "feeds" else ".html"))
+        if not os.path.exists(path):
+            self.send_error(404)
+            return
+
+        with open(path, "rb") as f:
+            body = f.read().replace(BASE_PLACEHOLDER.encode(), server.base_url.encode())
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if kind == "feeds" and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml" if kind == "feeds" else "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if kind == "feeds":
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FixtureServer:
+    """
+    Local HTTP server for the recorded fixtures, usable as a context manager
+    feed_urls lists the recorded feeds at the server's address
+    """
+
+    def __init__(self, data_dir=DATA_DIR, latency=0.0, port=0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.data_dir = data_dir
+        self.httpd.latency = latency
+        self.httpd.lock = threading.Lock()
+        self.httpd.hits = 0
+        self.httpd.base_url = f"http://127.0.0.1:{self.httpd.server_port}"
+        feeds = sorted(os.listdir(os.path.join(data_dir, "feeds")), key=lambda n: int(n[4:-4]))
+        self.feed_urls = [f"{self.httpd.base_url}/feeds/{name[:-4]}" for name in feeds]
+
+    @property
+    def hits(self):
+        return self.httpd.hits
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["record"]:
+        record_fixtures()
+    else:
+        with FixtureServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765) as server:
+            print("Serving feeds:\n" + "\n".join(server.feed_urls))
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,112 @@
+"""
+Local stand-in for the OpenRouter chat completions endpoint
+Every request waits `latency` seconds and answers with a canned summary. Every
+`throttle_every`-th request is answered with 429 and Retry-After: 0 instead, to
+exercise the client's retry path. The highest number of concurrent requests is recorded.
+Summaries take `token_delay` seconds per word on top of that. Requests with
+"stream": true get them as Server-Sent Events instead, one word per event as it
+is written, the way OpenRouter streams (a keep-alive comment first, a usage event and [DONE] last).
+"""
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, payload, headers=()):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_event(self, data):
+        self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def send_stream(self, article, summary):
+        # The summary as SSE chat completion chunks; the connection is closed to end the body
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        self.wfile.write(b": OPENROUTER PROCESSING\n\n")
+        for i, word in enumerate(summary.split()):
+            time.sleep(self.server.token_delay)
+            delta = {'role': "assistant", 'content': word if i == 0 else " " + word}
+            self.send_event(json.dumps({'choices': [{'index': 0, 'delta': delta}]}))
+        self.send_event(json.dumps({
+            'choices': [{'index': 0, 'delta': {}, 'finish_reason': "stop"}],
+            'usage': {'prompt_tokens': len(article.split()), 'completion_tokens': len(summary.split())},
+        }))
+        self.send_event("[DONE]")
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests += 1
+            number = server.requests
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+        if server.throttle_every and number % server.throttle_every == 0:
+            self.send_json(429, {'error': "rate limited"}, [("Retry-After", "0")])
+            return
+
+        article = request['messages'][-1]['content']
+        summary = " ".join(article.split()[-40:])
+        if request.get('stream'):
+            self.send_stream(article, summary)
+            return
+        # Without streaming the answer comes once every word is generated
+        time.sleep(server.token_delay * len(summary.split()))
+        self.send_json(200, {
+            'choices': [{'message': {'role': "assistant", 'content': summary}}],
+            'usage': {'prompt_tokens': len(article.split()), 'completion_tokens': len(summary.split())},
+        })
+
+
+class MockOpenRouter:
+    """Mock server as a context manager; `url` is its chat completions endpoint"""
+
+    def __init__(self, latency=0.05, throttle_every=0, token_delay=0.0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.throttle_every = throttle_every
+        self.httpd.token_delay = token_delay
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = self.httpd.in_flight = self.httpd.max_in_flight = 0
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/api/v1/chat/completions"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    @property
+    def max_in_flight(self):
+        return self.httpd.max_in_flight
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
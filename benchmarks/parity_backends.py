@@ -0,0 +1,106 @@
+"""
+Quality parity, latency and memory of the inference backends against full-precision PyTorch
+Usage: python benchmarks/parity_backends.py [backend ...]   (default: int8 onnx)
+Every backend runs in its own process on the bundled sample articles, so its peak
+resident memory can be measured. Summaries are compared with the PyTorch ones
+by ROUGE-L F1 and by exact match. The summary cache is bypassed.
+"""
+import sys
+import os
+import json
+import time
+import queue
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+ARTICLES_FILE = os.path.join(ROOT, "astronomy_articles.json")
+MIN_ROUGE_L = 0.8   # Mean ROUGE-L F1 a backend needs to count as on par
+
+
+def run_backend(backend, contents, results):
+    # Child process: load one backend and summarize every article with it; an error
+    # (an optional dependency missing, say) is sent back instead of the results
+    try:
+        import resource
+        from news_summarize import get_local_model, summarize_articles_batched
+
+        os.chdir(ROOT)
+        summarizer, tokenizer = get_local_model(backend=backend)
+        start = time.perf_counter()
+        summaries = summarize_articles_batched(contents, summarizer, tokenizer, use_cache=False)
+        elapsed = time.perf_counter() - start
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        results.put((backend, summaries, elapsed, peak_mb))
+    except Exception as e:
+        results.put((backend, f"{type(e).__name__}: {e}"))
+
+
+def rouge_l(reference, candidate):
+    # ROUGE-L F1 over lower-cased words, from the longest common subsequence
+    ref, cand = reference.lower().split(), candidate.lower().split()
+    if not ref or not cand:
+        return 0.0
+    previous = [0] * (len(cand) + 1)
+    for r in ref:
+        current = [0]
+        for j, c in enumerate(cand, 1):
+            current.append(previous[j - 1] + 1 if r == c else max(previous[j], current[j - 1]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(cand), lcs / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def measure(backend, contents):
+    # Run one backend in a fresh process; raises RuntimeError if it failed or died
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=run_backend, args=(backend, contents, results))
+    process.start()
+    while True:
+        try:
+            outcome = results.get(timeout=1.0)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"process exited with code {process.exitcode}")
+    process.join()
+    if len(outcome) == 2:
+        raise RuntimeError(outcome[1])
+    return outcome
+
+
+def main():
+    backends = sys.argv[1:] or ['int8', 'onnx']
+
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        contents = [a['content'] for a in json.load(f) if a.get('content')]
+
+    try:
+        _, reference, base_time, base_mb = measure('torch', contents)
+    except RuntimeError as e:
+        sys.exit(f"torch reference failed: {e}")
+    print(f"{'backend':<8}{'time (s)':>10}{'speedup':>9}{'peak MB':>9}{'ROUGE-L':>9}{'exact':>7}  verdict")
+    print(f"{'torch':<8}{base_time:>10.1f}{1:>8.1f}x{base_mb:>9.0f}{1:>9.3f}{len(contents):>7}  reference")
+
+    for backend in backends:
+        try:
+            _, summaries, elapsed, peak_mb = measure(backend, contents)
+        except RuntimeError as e:
+            print(f"{backend:<8} skipped: {e}")
+            continue
+
+        scores = [rouge_l(r, s) for r, s in zip(reference, summaries)]
+        mean = sum(scores) / len(scores)
+        exact = sum(r == s for r, s in zip(reference, summaries))
+        verdict = "on par" if mean >= MIN_ROUGE_L else "QUALITY DROP"
+        print(f"{backend:<8}{elapsed:>10.1f}{base_time / elapsed:>8.1f}x{peak_mb:>9.0f}"
+              f"{mean:>9.3f}{exact:>7}  {verdict}")
+
+
+if __name__ == "__main__":
+    main()
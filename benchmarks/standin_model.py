@@ -0,0 +1,63 @@
+"""
+Tiny stand-in for the summarization model, so the benchmarks run without torch or a download
+The tokenizer is a small WordPiece vocabulary trained on the fixture articles, wrapped
+as a fast transformers tokenizer (offsets included), and the "model" copies the leading
+tokens of every input up to max_length. Both are deterministic, so timings of the code
+around the model are comparable between runs. Given a streamer, the summary tokens
+are fed to it one at a time, `token_delay` seconds apart, like generate() does.
+"""
+import time
+
+import numpy as np
+from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, trainers
+from transformers import PreTrainedTokenizerFast
+
+VOCAB_SIZE = 4000
+
+
+def build_tokenizer(texts, vocab_size=VOCAB_SIZE):
+    tokenizer = Tokenizer(models.WordPiece(unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    trainer = trainers.WordPieceTrainer(vocab_size=vocab_size, special_tokens=["[UNK]", "[PAD]"],
+                                        show_progress=False)
+    tokenizer.train_from_iterator(texts, trainer)
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]",
+                                   model_max_length=512)
+
+
+class StandInSummarizer:
+    """Callable with the summarization pipeline's interface: lead-tokens "summaries" of its inputs"""
+
+    def __init__(self, tokenizer, token_delay=0.0):
+        self.tokenizer = tokenizer
+        self.token_delay = token_delay
+        self.calls = 0
+        self.texts = 0
+
+    def __call__(self, texts, max_length=120, min_length=0, truncation=True, streamer=None, **kwargs):
+        batch = [texts] if isinstance(texts, str) else list(texts)
+        self.calls += 1
+        self.texts += len(batch)
+        encoded = self.tokenizer(batch, truncation=truncation, max_length=self.tokenizer.model_max_length,
+                                 add_special_tokens=False)
+        if streamer is not None:
+            self.stream(encoded['input_ids'][0], max_length, streamer)
+        elif self.token_delay:
+            time.sleep(self.token_delay * max(min(len(ids), max_length) for ids in encoded['input_ids']))
+        return [{'summary_text': self.tokenizer.decode(ids[:max_length])} for ids in encoded['input_ids']]
+
+
+    def stream(self, ids, max_length, streamer):
+        # Feed the prompt, then each generated token, then the end of generation
+        streamer.put(np.array([ids]))
+        for token in ids[:max_length]:
+            time.sleep(self.token_delay)
+            streamer.put(np.array([token]))
+        streamer.end()
+
+
+def load_standin_model(texts):
+    """(summarizer, tokenizer) pair trained on texts"""
+    tokenizer = build_tokenizer(texts)
+    return StandInSummarizer(tokenizer), tokenizer
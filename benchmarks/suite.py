@@ -0,0 +1,303 @@
+"""
+Reproducible benchmark suite: scrape, chunk, summarize and persist, fully offline
+Usage: python benchmarks/suite.py [--runs N] [--only NAME,...] [--model standin|local]
+                                  [--output REPORT.json] [--baseline FILE] [--update-baseline]
+                                  [--tolerance 0.25]
+
+Feeds and article pages are replayed from benchmarks/data by a local HTTP server,
+OpenRouter is replaced by a local mock, and everything the pipeline writes goes
+to a temporary directory. `--model standin` (the default) uses a tiny deterministic
+stand-in for the summarization model, so the suite runs in CI without torch;
+`--model local` uses the real local model.
+
+Every benchmark runs N times (default 5). The report holds the median, min and max
+seconds of each one plus its own counters, and is compared against the stored
+baseline: a benchmark whose median is more than `tolerance` slower (and at least
+REGRESSION_FLOOR seconds slower) is a regression, and the suite exits with status 1.
+"""
+import sys
+import os
+import io
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import contextlib
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "api_integration"))
+
+ARTICLES_FILE = os.path.join(ROOT, "astronomy_articles.json")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+HTTP_LATENCY = 0.02         # Seconds added to every fixture request, roughly a fast CDN
+API_LATENCY = 0.05          # Seconds the mock OpenRouter takes per request
+API_THROTTLE_EVERY = 5      # Every n-th mock API request is answered with 429
+STORE_RECORDS = 2000        # Records in the store the load benchmark reads from
+REGRESSION_FLOOR = 0.002    # Smaller slowdowns, in seconds, are noise
+
+
+class Context:
+    """Shared state of one suite run: fixture server, model, articles and scratch directory"""
+
+    def __init__(self, server, summarizer, tokenizer, articles, workdir):
+        self.server = server
+        self.summarizer = summarizer
+        self.tokenizer = tokenizer
+        self.articles = articles
+        self.contents = [a['content'] for a in articles]
+        self.workdir = workdir
+        self.runs = 0
+
+    def path(self, name):
+        # Fresh file name inside the scratch directory
+        self.runs += 1
+        return os.path.join(self.workdir, f"{self.runs}-{name}")
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def bench_scrape_cold(ctx):
+    from news_scrape import get_astronomy_articles
+
+    seconds, articles = timed(get_astronomy_articles, rss_feeds=ctx.server.feed_urls, cache_file=None)
+    return {'seconds': seconds, 'articles': len(articles)}
+
+
+def bench_scrape_cached(ctx):
+    # Second run against a warm feed cache: conditional requests answered with 304
+    from news_scrape import get_astronomy_articles
+
+    cache_file = ctx.path("feed_cache.json")
+    get_astronomy_articles(rss_feeds=ctx.server.feed_urls, cache_file=cache_file)
+    seconds, articles = timed(get_astronomy_articles, rss_feeds=ctx.server.feed_urls, cache_file=cache_file)
+    return {'seconds': seconds, 'articles': len(articles)}
+
+
+def bench_chunkify_articles(ctx):
+    from news_summarize import chunkify
+
+    seconds, chunks = timed(lambda: [chunkify(c, ctx.tokenizer) for c in ctx.contents])
+    return {'seconds': seconds, 'chunks': sum(len(c) for c in chunks)}
+
+
+def bench_chunkify_joined(ctx):
+    from news_summarize import chunkify
+
+    text = "\n\n".join(ctx.contents)
+    seconds, chunks = timed(chunkify, text, ctx.tokenizer)
+    return {'seconds': seconds, 'chunks': len(chunks), 'chars': len(text)}
+
+
+def bench_summarize_single_cold(ctx):
+    from news_summarize import summarize_single_article
+    from summary_cache import get_summary_cache
+
+    get_summary_cache().clear()
+    calls = getattr(ctx.summarizer, 'texts', None)
+    seconds, _ = timed(lambda: [summarize_single_article(c, ctx.summarizer, ctx.tokenizer)
+                                for c in ctx.contents])
+    result = {'seconds': seconds, 'articles_per_second': len(ctx.contents) / seconds}
+    if calls is not None:
+        result['model_texts'] = ctx.summarizer.texts - calls
+    return result
+
+
+def bench_summarize_single_cached(ctx):
+    from news_summarize import summarize_single_article
+
+    for content in ctx.contents:
+        summarize_single_article(content, ctx.summarizer, ctx.tokenizer)
+    seconds, _ = timed(lambda: [summarize_single_article(c, ctx.summarizer, ctx.tokenizer)
+                                for c in ctx.contents])
+    return {'seconds': seconds, 'articles_per_second': len(ctx.contents) / seconds}
+
+
+def bench_openrouter_mock(ctx):
+    from news_summarizer_api import llama33_summarize_many, FAILED_SUMMARY
+    from summary_cache import get_summary_cache
+    from mock_openrouter import MockOpenRouter
+
+    get_summary_cache().clear()
+    os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+    with MockOpenRouter(latency=API_LATENCY, throttle_every=API_THROTTLE_EVERY) as mock:
+        seconds, summaries = timed(llama33_summarize_many, ctx.contents, base_url=mock.url,
+                                   requests_per_minute=60000)
+    return {'seconds': seconds, 'requests': mock.requests, 'max_in_flight': mock.max_in_flight,
+            'failed': sum(s == FAILED_SUMMARY for s in summaries)}
+
+
+def bench_store_save(ctx):
+    from news_summarize import save_articles_to_store
+
+    path = ctx.path("summaries.jsonl")
+    seconds, saved = timed(lambda: [save_articles_to_store(ctx.articles, path) for _ in range(10)])
+    records = sum(len(s) for s in saved)
+    return {'seconds': seconds, 'records': records, 'records_per_second': records / seconds}
+
+
+def bench_store_load(ctx):
+    from article_store import JsonlStore
+    from news_summarize import clean_article
+
+    path = os.path.join(ctx.workdir, "load.jsonl")
+    if not os.path.exists(path):
+        records = [clean_article(a) for a in ctx.articles]
+        JsonlStore(path).extend([dict(records[i % len(records)], url=f"{records[i % len(records)]['url']}#{i}")
+                                 for i in range(STORE_RECORDS)])
+
+    store = JsonlStore(path)
+    seconds, loaded = timed(lambda: (store.latest_unique(200), sum(1 for _ in store)))
+    return {'seconds': seconds, 'latest': len(loaded[0]), 'scanned': loaded[1]}
+
+
+BENCHMARKS = {
+    'scrape_cold': bench_scrape_cold,
+    'scrape_cached': bench_scrape_cached,
+    'chunkify_articles': bench_chunkify_articles,
+    'chunkify_joined': bench_chunkify_joined,
+    'summarize_single_cold': bench_summarize_single_cold,
+    'summarize_single_cached': bench_summarize_single_cached,
+    'openrouter_mock': bench_openrouter_mock,
+    'store_save': bench_store_save,
+    'store_load': bench_store_load,
+}
+
+
+def load_model(kind, contents):
+    if kind == 'local':
+        from news_summarize import get_local_model
+        return get_local_model()
+    from standin_model import load_standin_model
+    return load_standin_model(contents)
+
+
+def environment(model):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+        'model': model,
+    }
+
+
+def run_suite(names, runs, model):
+    """Runs the named benchmarks and returns the report"""
+    import metrics
+    metrics.configure("")  # measure the pipeline, not the instrumentation
+
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        articles = [a for a in json.load(f) if a.get('content')]
+
+    from fixture_server import FixtureServer
+
+    workdir = tempfile.mkdtemp(prefix="news-bench-")
+    cwd = os.getcwd()
+    results = {}
+    try:
+        # Caches, stores and indexes are created relative to the working directory
+        os.chdir(workdir)
+        summarizer, tokenizer = load_model(model, [a['content'] for a in articles])
+        with FixtureServer(latency=HTTP_LATENCY) as server:
+            ctx = Context(server, summarizer, tokenizer, articles, workdir)
+            for name in names:
+                samples = []
+                for _ in range(runs):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        samples.append(BENCHMARKS[name](ctx))
+                seconds = [s.pop('seconds') for s in samples]
+                results[name] = {'median_s': statistics.median(seconds), 'min_s': min(seconds),
+                                 'max_s': max(seconds), 'runs': runs, **samples[-1]}
+                print(f"  {name:<26}{results[name]['median_s']:>10.4f} s")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {'created': datetime.now().isoformat(timespec="seconds"), 'environment': environment(model),
+            'results': results}
+
+
+def compare(report, baseline, tolerance):
+    """Prints each benchmark against the baseline and returns the names that regressed"""
+    if baseline['environment'].get('model') != report['environment']['model']:
+        print("Baseline was recorded with a different model; skipping the comparison")
+        return []
+
+    regressions = []
+    print(f"\n{'benchmark':<26}{'baseline (s)':>13}{'now (s)':>10}{'change':>9}")
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<26}{'-':>13}{result['median_s']:>10.4f}{'new':>9}")
+            continue
+        change = result['median_s'] / base['median_s'] - 1 if base['median_s'] else 0.0
+        regressed = change > tolerance and result['median_s'] - base['median_s'] > REGRESSION_FLOOR
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<26}{base['median_s']:>13.4f}{result['median_s']:>10.4f}{change:>+8.0%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--only", help="comma-separated benchmark names: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--model", choices=("standin", "local"), default="standin")
+    parser.add_argument("--output", help="where to write the JSON report")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    print(f"Running {len(names)} benchmarks x {args.runs} runs ({args.model} model)")
+    report = run_suite(names, args.runs, args.model)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; record one with --update-baseline")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        regressions = compare(report, json.load(f), args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressions: {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
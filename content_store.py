@@ -0,0 +1,66 @@
+import hashlib
+import sqlite3
+import threading
+import zlib
+
+CONTENT_STORE_FILE = "article_content.db"
+COMPRESSION_LEVEL = 6
+
+
+def content_ref(content):
+    # Reference of an article body: the SHA-256 of its exact text
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class ContentStore:
+    """
+    Content-addressed store of article bodies
+    Records keep only a reference to their body, so the same text is stored once
+    however many article, summary and cache records point at it, and is read back
+    only when something asks for it. Bodies are zlib-compressed in a SQLite file,
+    shared safely by the UI, CLI, poller and worker processes. Bodies are never
+    deleted; the file grows with the number of distinct articles
+    """
+
+    def __init__(self, filename=CONTENT_STORE_FILE):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS contents (ref TEXT PRIMARY KEY, body BLOB NOT NULL)")
+
+    def put(self, content):
+        # Store a body and return its reference; known bodies are not written again
+        return self.put_many([content])[0]
+
+    def put_many(self, contents):
+        # Store several bodies in one transaction; returns their references
+        refs = [content_ref(content) for content in contents]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO contents (ref, body) VALUES (?, ?)",
+                [(ref, zlib.compress(content.encode("utf-8"), COMPRESSION_LEVEL))
+                 for ref, content in zip(refs, contents)
+                 if not self._db.execute("SELECT 1 FROM contents WHERE ref = ?", (ref,)).fetchone()])
+            self._db.commit()
+        return refs
+
+    def get(self, ref):
+        # The body behind a reference, or None if it is not stored
+        with self._lock:
+            row = self._db.execute("SELECT body FROM contents WHERE ref = ?", (ref,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_content_store():
+    # The content store of this process, used wherever article bodies are written or
+    # read back: scraping, the UI, the feed poller and the summary worker
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = ContentStore()
+        return _shared_store
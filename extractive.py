@@ -0,0 +1,113 @@
+"""
+Extractive sentence selection ahead of abstractive summarization
+
+Sentences are scored with TextRank over their TF-IDF vectors. One sparse
+matrix product gives every pairwise cosine similarity, and the scores come from
+power iteration on the row-normalized similarity graph. Boilerplate such as
+image credits, captions and newsletter prompts is dropped before scoring.
+"""
+import re
+
+import numpy as np
+from scipy import sparse
+
+DAMPING = 0.85          # TextRank damping factor
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+MIN_WORDS = 5           # Shorter "sentences" are captions, credits or headings
+
+WORD = re.compile(r"[a-z0-9]+(?:['’][a-z]+)?")
+
+BOILERPLATE = re.compile(
+    r"^(?:image|photo|video|illustration|credit|credits|caption|source)s?\b\s*[:|-]"
+    r"|\b(?:image|photo|video) credit\b"
+    r"|\b(?:subscribe|sign up|newsletter|follow us|read more|click here|all rights reserved"
+    r"|cookies?|advertisement)\b",
+    re.IGNORECASE)
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'been', 'but', 'by', 'can', 'for', 'from', 'had',
+    'has', 'have', 'he', 'her', 'his', 'how', 'i', 'if', 'in', 'into', 'is', 'it', 'its', 'more',
+    'not', 'of', 'on', 'one', 'or', 'our', 'she', 'so', 'than', 'that', 'the', 'their', 'them',
+    'there', 'these', 'they', 'this', 'those', 'to', 'was', 'we', 'were', 'what', 'when', 'which',
+    'who', 'will', 'with', 'would', 'you', 'also', 'about', 'after', 'all', 'just', 'some', 'such'
+}
+
+
+def is_boilerplate(sentence):
+    return len(sentence.split()) < MIN_WORDS or BOILERPLATE.search(sentence) is not None
+
+
+def tfidf_matrix(sentences):
+    # Sparse sentences x terms matrix of sublinear TF-IDF weights, rows L2-normalized
+    vocabulary = {}
+    rows, columns, counts = [], [], []
+    for row, sentence in enumerate(sentences):
+        terms = {}
+        for word in WORD.findall(sentence.lower()):
+            if word not in STOP_WORDS:
+                terms[word] = terms.get(word, 0) + 1
+        for word, count in terms.items():
+            rows.append(row)
+            columns.append(vocabulary.setdefault(word, len(vocabulary)))
+            counts.append(count)
+
+    matrix = sparse.csr_matrix((np.log1p(np.array(counts, dtype=np.float64)), (rows, columns)),
+                               shape=(len(sentences), len(vocabulary)))
+    document_frequency = np.bincount(columns, minlength=len(vocabulary))
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    matrix = matrix @ sparse.diags(idf)
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+
+def textrank(sentences):
+    # TextRank salience of every sentence; the scores sum to 1
+    count = len(sentences)
+    if count == 0:
+        return np.zeros(0)
+
+    vectors = tfidf_matrix(sentences)
+    similarity = (vectors @ vectors.T).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    # Row-stochastic transition matrix; sentences sharing no terms jump uniformly
+    out_weight = np.asarray(similarity.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    out_weight[dangling] = 1
+    transition = (sparse.diags(1 / out_weight) @ similarity).T.tocsr()
+
+    scores = np.full(count, 1 / count)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / count + DAMPING * (transition @ scores + scores[dangling].sum() / count)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def select_sentences(sentences, token_counts, budget):
+    """
+    Indices, in document order, of the most salient sentences whose token counts fit the budget
+    Boilerplate and repeated sentences are never selected unless nothing else is left
+    """
+    candidates, seen = [], set()
+    for i, sentence in enumerate(sentences):
+        normalized = " ".join(sentence.lower().split())
+        if normalized not in seen and not is_boilerplate(sentence):
+            candidates.append(i)
+        seen.add(normalized)
+    if not candidates:
+        candidates = list(range(len(sentences)))
+
+    scores = textrank([sentences[i] for i in candidates])
+    chosen, used = [], 0
+    for position in np.argsort(-scores, kind="stable"):
+        i = candidates[position]
+        if used + token_counts[i] <= budget:
+            chosen.append(i)
+            used += token_counts[i]
+    return sorted(chosen)
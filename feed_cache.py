@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+
+FEED_CACHE_FILE = "feed_cache.json"
+
+
+class FeedCache:
+    """
+    Persistent HTTP cache for the RSS scraper
+    Keeps the ETag/Last-Modified validators and entries of every feed so an
+    unchanged feed can be answered with a 304, and the parsed article of every
+    entry URL so already-seen articles are never downloaded again (article bodies
+    live in the content store; the cache keeps their references)
+    """
+
+    def __init__(self, filename=FEED_CACHE_FILE):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self.feeds = {}     # feed url -> {'etag', 'modified', 'source', 'entries'}
+        self.articles = {}  # article url -> article record, its body in the content store
+        self.load()
+
+    def load(self):
+        # Load the cache from disk, starting empty if it is missing or unreadable
+        if not self.filename or not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.feeds = data.get('feeds', {})
+            self.articles = data.get('articles', {})
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable feed cache {self.filename}: {e}")
+
+    def save(self):
+        # Write the cache atomically, dropping articles no feed refers to anymore
+        if not self.filename:
+            return
+        with self._lock:
+            live_urls = {entry['link'] for feed in self.feeds.values() for entry in feed['entries']}
+            self.articles = {url: a for url, a in self.articles.items() if url in live_urls}
+            data = {'feeds': self.feeds, 'articles': self.articles}
+
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_filename, self.filename)
+
+    def validators(self, feed_url):
+        # Return the (etag, modified) pair to send with the next request for a feed
+        feed = self.feeds.get(feed_url, {})
+        return feed.get('etag'), feed.get('modified')
+
+    def get_feed(self, feed_url):
+        return self.feeds.get(feed_url)
+
+    def put_feed(self, feed_url, etag, modified, source, entries):
+        with self._lock:
+            self.feeds[feed_url] = {
+                'etag': etag,
+                'modified': modified,
+                'source': source,
+                'entries': [
+                    {
+                        'title': entry.get('title', ''),
+                        'link': entry.get('link', ''),
+                        'published': entry.get('published'),
+                    }
+                    for entry in entries
+                ]
+            }
+
+    def get_article(self, url):
+        article = self.articles.get(url)
+        return dict(article) if article is not None else None
+
+    def put_article(self, url, article_data):
+        with self._lock:
+            self.articles[url] = dict(article_data)
@@ -0,0 +1,276 @@
+"""
+Long-running feed poller: every feed on its own schedule, adapted to how often it publishes
+Usage: python feed_poller.py [--once] [--summarize] [feed_url ...]
+
+Each feed keeps a watermark (the newest publication time it has delivered, plus
+the links already seen) and an estimate of its publishing rate. A poll fetches
+every entry past the watermark; only entries whose article was downloaded move
+the watermark, so failed downloads are retried by the next polls, and the next poll is scheduled so that roughly
+TARGET_NEW_ENTRIES new entries will be waiting: busy feeds are polled every few
+minutes, quiet ones every few hours. Feed validators still go out with every
+request, so an unchanged feed costs a 304.
+
+New articles go into the article index, near-duplicates are marked as usual, and
+with --summarize every poll's new articles are queued for the summary worker, which
+saves their summaries to the summaries store and the article index.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import metrics
+from article_index import get_article_index, published_timestamp
+from feed_cache import FEED_CACHE_FILE
+from near_duplicates import get_near_duplicate_index
+from news_scrape import RSS_FEEDS, ENTRIES_PER_FEED, iter_astronomy_articles
+
+POLLER_STATE_FILE = "poller_state.json"
+MIN_INTERVAL = 5 * 60           # Seconds; no feed is polled more often
+MAX_INTERVAL = 6 * 3600         # Seconds; no feed is polled less often
+FIRST_INTERVAL = 30 * 60        # Interval of a feed until its rate is known
+TARGET_NEW_ENTRIES = 1.0        # New entries a poll should find on average
+RATE_WINDOW = 14 * 86400        # Seconds of publication history the rate is estimated from
+RATE_SMOOTHING = 0.5            # Weight of the latest poll in the smoothed rate
+JITTER = 0.1                    # Random spread of intervals, so feeds drift apart
+BACKFILL_ENTRIES = ENTRIES_PER_FEED  # Entries taken from a feed polled for the first time
+SEEN_LINKS = 200                # Links remembered per feed
+WATERMARK_GRACE = 3600          # Unseen entries dated this long before the watermark still count
+FETCH_ATTEMPTS = 3              # Polls an entry whose article fails to download is retried in
+
+
+def entry_timestamp(entry):
+    return published_timestamp(entry.get('published'))
+
+
+def publish_rate(entries, now, window=RATE_WINDOW):
+    """
+    Entries per second a feed published over the last `window` seconds, from its
+    entries' dates; None if no entry carries a date
+    """
+    stamps = [ts for ts in map(entry_timestamp, entries) if ts is not None]
+    if not stamps:
+        return None
+    recent = [ts for ts in stamps if now - ts <= window]
+    # A feed listing less history than the window is measured over what it lists
+    span = window if len(recent) < len(stamps) else now - min(stamps)
+    return len(recent) / max(span, MIN_INTERVAL)
+
+
+def next_interval(rate):
+    # Seconds until TARGET_NEW_ENTRIES are expected, within [MIN_INTERVAL, MAX_INTERVAL]
+    if not rate:
+        return MAX_INTERVAL
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, TARGET_NEW_ENTRIES / rate))
+
+
+class PollerState:
+    """
+    Persistent schedule of the poller: per feed the watermark, the links already
+    delivered, the smoothed publishing rate and when it is due next
+    """
+
+    def __init__(self, filename=POLLER_STATE_FILE):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self.feeds = {}  # feed url -> {'watermark', 'seen', 'attempts', 'rate', 'interval', 'last_poll', 'next_poll'}
+        self.load()
+
+    def load(self):
+        # Load the state from disk, starting empty if it is missing or unreadable
+        if not self.filename or not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                self.feeds = json.load(f).get('feeds', {})
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable poller state {self.filename}: {e}")
+
+    def save(self):
+        if not self.filename:
+            return
+        with self._lock:
+            data = json.dumps({'feeds': self.feeds}, ensure_ascii=False)
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_filename, self.filename)
+
+    def feed(self, feed_url):
+        with self._lock:
+            return self.feeds.setdefault(feed_url, {
+                'watermark': None,
+                'seen': [],
+                'attempts': {},
+                'rate': None,
+                'interval': FIRST_INTERVAL,
+                'last_poll': None,
+                'next_poll': 0.0,
+            })
+
+    def due(self, feed_urls, now):
+        return [url for url in feed_urls if self.feed(url)['next_poll'] <= now]
+
+    def next_due(self, feed_urls):
+        return min(self.feed(url)['next_poll'] for url in feed_urls)
+
+    def postpone(self, feed_url, now):
+        # Push a feed back by its current interval; a failed poll is then retried no sooner
+        state = self.feed(feed_url)
+        with self._lock:
+            state['next_poll'] = now + state['interval']
+
+    def select_new(self, feed_url, entries, now):
+        """
+        Entries past the feed's watermark that were not delivered before, oldest
+        first, and reschedules the feed; the watermark moves in commit() once
+        their articles are downloaded
+        """
+        state = self.feed(feed_url)
+        with self._lock:
+            seen = set(state['seen'])
+            first_poll = state['last_poll'] is None
+            watermark = state['watermark']
+            new = [entry for entry in entries if entry.get('link') and entry['link'] not in seen
+                   and (watermark is None or (entry_timestamp(entry) or now) >= watermark - WATERMARK_GRACE)]
+            if first_poll:
+                # Start from the latest few entries instead of the feed's whole history
+                skipped = [entry['link'] for entry in new[BACKFILL_ENTRIES:]]
+                state['seen'] = (state['seen'] + skipped)[-SEEN_LINKS:]
+                new = new[:BACKFILL_ENTRIES]
+            new.sort(key=lambda entry: entry_timestamp(entry) or now)
+
+            # Rate from the feed's own dates when it has them, otherwise from what polls find
+            sample = publish_rate(entries, now)
+            if sample is None and not first_poll:
+                sample = len(new) / max(now - state['last_poll'], 1.0)
+            if sample is not None:
+                rate = state['rate']
+                state['rate'] = sample if rate is None else RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * rate
+            if state['rate'] is not None:
+                state['interval'] = next_interval(state['rate'])
+            state['last_poll'] = now
+            state['next_poll'] = now + state['interval'] * random.uniform(1 - JITTER, 1 + JITTER)
+        return new
+
+    def commit(self, feed_url, delivered, failed, now):
+        """
+        Records the entries whose articles were downloaded as seen and moves the
+        watermark past them, but not past a failed entry, which stays due until
+        it has failed FETCH_ATTEMPTS polls in a row
+        """
+        state = self.feed(feed_url)
+        with self._lock:
+            attempts = state.setdefault('attempts', {})
+            retry = []
+            for entry in failed:
+                attempts[entry['link']] = attempts.get(entry['link'], 0) + 1
+                if attempts[entry['link']] >= FETCH_ATTEMPTS:
+                    print(f"Giving up on {entry['link']} after {FETCH_ATTEMPTS} failed downloads")
+                    delivered = delivered + [entry]
+                else:
+                    retry.append(entry)
+            for entry in delivered:
+                attempts.pop(entry['link'], None)
+
+            previous = state['watermark']
+            stamps = [ts for ts in map(entry_timestamp, delivered) if ts is not None]
+            if previous is not None:
+                stamps.append(previous)
+            watermark = max(stamps, default=None)
+            retry_stamps = [entry_timestamp(entry) or now for entry in retry]
+            if watermark is not None and retry_stamps:
+                # Stay at the oldest entry still to be retried, so the next poll selects it again
+                watermark = min(watermark, min(retry_stamps))
+                if previous is not None:
+                    watermark = max(watermark, previous)
+            state['watermark'] = watermark
+            state['seen'] = (state['seen'] + [entry['link'] for entry in delivered])[-SEEN_LINKS:]
+
+
+def poll_feeds(feed_urls, state, cache_file=FEED_CACHE_FILE, index=None, near_duplicates=None):
+    """
+    Polls the given feeds once and returns the articles of their new entries
+    Articles go into the index; the state is saved afterwards
+    """
+    now = time.time()
+    fetched = {feed_url: ([], []) for feed_url in feed_urls}  # feed url -> (delivered, failed) entries
+
+    def select_entries(feed_url, entries):
+        return state.select_new(feed_url, entries, now)
+
+    def on_fetched(feed_url, entry, article):
+        fetched[feed_url][article is None].append(entry)
+
+    for feed_url in feed_urls:
+        state.postpone(feed_url, now)
+        metrics.count("feed_polls_total", host=urlparse(feed_url).netloc)
+    try:
+        articles = list(iter_astronomy_articles(feed_urls, cache_file=cache_file, index=index, new_only=True,
+                                                near_duplicates=near_duplicates,
+                                                select_entries=select_entries, on_fetched=on_fetched))
+    finally:
+        # Entries whose download never finished are neither delivered nor failed; they stay due
+        for feed_url, (delivered, failed) in fetched.items():
+            state.commit(feed_url, delivered, failed, now)
+            metrics.count("poll_new_entries_total", len(delivered), host=urlparse(feed_url).netloc)
+        state.save()
+
+    for feed_url in feed_urls:
+        feed = state.feed(feed_url)
+        delivered, failed = fetched[feed_url]
+        print(f"📡 {feed_url}: {len(delivered)} new{f', {len(failed)} failed' if failed else ''}, "
+              f"next poll in {(feed['next_poll'] - now) / 60:.0f} min")
+    return articles
+
+
+def run_poller(feed_urls=None, state_file=POLLER_STATE_FILE, cache_file=FEED_CACHE_FILE, once=False,
+               summarize=False, stop=None):
+    """
+    Polls every feed whenever it is due, until interrupted or `stop` is set
+    With `once`, polls the due feeds a single time and returns
+    With `summarize`, queues each poll's new articles for the summary worker
+    """
+    if feed_urls is None:
+        feed_urls = RSS_FEEDS
+    stop = stop or threading.Event()
+    state = PollerState(state_file)
+    index = get_article_index()
+    near_duplicates = get_near_duplicate_index()
+    print(f"🛰️ Polling {len(feed_urls)} feeds")
+
+    while not stop.is_set():
+        due = state.due(feed_urls, time.time())
+        if due:
+            articles = poll_feeds(due, state, cache_file, index, near_duplicates)
+            if articles:
+                print(f"✅ {len(articles)} new articles")
+            if articles and summarize:
+                from summary_worker import submit_job, ensure_worker
+                submit_job(articles)
+                ensure_worker()
+            metrics.flush()
+        if once:
+            break
+        stop.wait(max(0.0, state.next_due(feed_urls) - time.time()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll the RSS feeds on adaptive schedules")
+    parser.add_argument("feeds", nargs="*", help="feed URLs (default: the built-in astronomy feeds)")
+    parser.add_argument("--once", action="store_true", help="poll the due feeds once and exit")
+    parser.add_argument("--summarize", action="store_true", help="queue new articles for the summary worker")
+    parser.add_argument("--state", default=POLLER_STATE_FILE)
+    args = parser.parse_args()
+
+    try:
+        run_poller(args.feeds or None, args.state, once=args.once, summarize=args.summarize)
+    except KeyboardInterrupt:
+        print("Poller stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Per-stage timing spans and counters for the fetch -> summarize pipeline
+
+Stages wrap their work in `with span("stage"):` and report counts with count()
+and observe(). What happens to the measurements depends on the configured sinks:
+- registry: kept in memory (histograms and counters) for the web UI to render
+- json:PATH: one JSON line per measurement appended to PATH
+- prometheus:PATH: the registry written to PATH in the Prometheus text format on flush()
+
+Sinks are chosen with the NEWS_METRICS environment variable, e.g.
+NEWS_METRICS=registry,json:metrics.jsonl, or with configure(). With no sinks
+(the default) span() hands out a shared no-op context manager and count() /
+observe() return at once, so instrumented code pays next to nothing.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+
+METRICS_ENV = "NEWS_METRICS"
+
+# Histogram bucket upper bounds, in seconds for latencies
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-quantile; estimates like Prometheus does
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class Registry:
+    """In-process store of counters and histograms, keyed by (name, sorted labels)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def record(self, kind, name, labels, value):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            if kind == 'count':
+                self.counters[key] = self.counters.get(key, 0) + value
+            else:
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram()
+                histogram.observe(value)
+
+    def flush(self):
+        pass
+
+    def snapshot(self):
+        # Copies of the counters and histograms, safe to read while recording goes on
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {}
+            for key, histogram in self.histograms.items():
+                copy = Histogram(histogram.buckets)
+                copy.counts, copy.sum, copy.count = list(histogram.counts), histogram.sum, histogram.count
+                histograms[key] = copy
+        return counters, histograms
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+class JsonLogSink:
+    """Appends every measurement to a JSON Lines file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, kind, name, labels, value):
+        line = json.dumps({'ts': time.time(), 'kind': kind, 'name': name, 'labels': labels,
+                           'value': value}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+
+class PrometheusSink:
+    """Writes a registry to a text file in the Prometheus exposition format on flush()"""
+
+    def __init__(self, path, registry):
+        self.path = path
+        self.registry = registry
+
+    def record(self, kind, name, labels, value):
+        pass  # the registry, also a sink, does the recording
+
+    def flush(self):
+        counters, histograms = self.registry.snapshot()
+        lines, typed = [], set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(histograms.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp, self.path)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels) + "}"
+
+
+REGISTRY = Registry()
+_sinks = []
+
+
+def configure(spec=None):
+    """
+    Sets the sinks from a spec like "registry,json:metrics.jsonl,prometheus:metrics.prom"
+    Without a spec, NEWS_METRICS is used; an empty spec turns metrics off
+    """
+    global _sinks
+    if spec is None:
+        spec = os.getenv(METRICS_ENV, "")
+
+    flush()
+    sinks = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        kind, _, path = part.partition(":")
+        if kind == 'registry':
+            sinks.append(REGISTRY)
+        elif kind == 'json':
+            sinks.append(JsonLogSink(path or "metrics.jsonl"))
+        elif kind == 'prometheus':
+            sinks.append(PrometheusSink(path or "metrics.prom", REGISTRY))
+            sinks.append(REGISTRY)
+        else:
+            raise ValueError(f"Unknown metrics sink {kind!r}")
+
+    unique = []
+    for sink in sinks:
+        if sink not in unique:
+            unique.append(sink)
+    _sinks = unique
+
+
+def enabled():
+    return bool(_sinks)
+
+
+def active_sinks():
+    return list(_sinks)
+
+
+def count(name, value=1, **labels):
+    # Add value to a counter
+    if not _sinks:
+        return
+    for sink in _sinks:
+        sink.record('count', name, labels, value)
+
+
+def observe(name, value, **labels):
+    # Add a value to a histogram
+    if not _sinks:
+        return
+    for sink in _sinks:
+        sink.record('observe', name, labels, value)
+
+
+class _Span:
+    __slots__ = ('stage', 'labels', 'start')
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(f"{self.stage}_seconds", time.perf_counter() - self.start, **self.labels)
+        if exc_type is not None:
+            count(f"{self.stage}_failures_total", **self.labels)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage, **labels):
+    """Times the enclosed block into the `<stage>_seconds` histogram; exceptions count as failures"""
+    if not _sinks:
+        return _NO_SPAN
+    return _Span(stage, labels)
+
+
+def flush():
+    for sink in _sinks:
+        sink.flush()
+
+
+configure()
+atexit.register(flush)
@@ -0,0 +1,184 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+
+NEAR_DUPLICATES_FILE = "near_duplicates.db"
+
+SHINGLE_SIZE = 5        # Words per shingle
+NUM_PERM = 128          # MinHash signature length
+BANDS = 16              # LSH bands of NUM_PERM // BANDS rows; candidates from ~0.7 similarity
+THRESHOLD = 0.8         # Estimated Jaccard similarity that makes two articles near-duplicates
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Fixed seed so signatures stay comparable across runs
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, MAX_HASH, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, MAX_HASH, size=NUM_PERM, dtype=np.uint64)
+
+WORD = re.compile(r"\w+")
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    # 32-bit hashes of the overlapping k-word shingles of the lower-cased text
+    words = WORD.findall((text or "").lower())
+    if len(words) < k:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + k]).encode("utf-8")) for i in range(len(words) - k + 1)}
+
+
+def minhash(text):
+    # MinHash signature: the minimum of each of NUM_PERM universal hash functions over the shingles
+    values = np.fromiter(shingles(text), dtype=np.uint64)
+    if values.size == 0:
+        return np.full(NUM_PERM, MAX_HASH, dtype=np.uint64)
+    # (a * x + b) mod p mod 2^32 for every (permutation, shingle) pair at once; a, x < 2^32 so no overflow
+    hashed = ((np.outer(_A, values) + _B[:, None]) % MERSENNE_PRIME) & MAX_HASH
+    return hashed.min(axis=1)
+
+
+def similarity(signature, other):
+    # Estimated Jaccard similarity of the shingle sets behind two signatures
+    return float(np.mean(signature == other))
+
+
+def band_keys(signature):
+    # One bucket key per LSH band; documents sharing any key are similarity candidates
+    rows = NUM_PERM // BANDS
+    return [
+        int.from_bytes(hashlib.blake2b(signature[b * rows:(b + 1) * rows].tobytes(),
+                                       digest_size=8).digest(), "big", signed=True)
+        for b in range(BANDS)
+    ]
+
+
+class NearDuplicateIndex:
+    """
+    Persistent MinHash/LSH index of article contents
+    Each article is stored with its signature, its LSH band keys and the
+    representative of its near-duplicate cluster. A lookup only compares against
+    articles sharing a band bucket, so it stays sub-linear as the archive grows
+    """
+
+    def __init__(self, filename=NEAR_DUPLICATES_FILE, threshold=THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                doc_id TEXT PRIMARY KEY,
+                signature BLOB NOT NULL,
+                representative TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL,
+                key INTEGER NOT NULL,
+                doc_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, key);
+        """)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def find(self, text):
+        # Most similar indexed article as (doc_id, representative, similarity), or None
+        signature = minhash(text)
+        with self._lock:
+            return self._best_match(signature, band_keys(signature))
+
+    def add(self, doc_id, text):
+        # Index an article and return the representative of its cluster.
+        # That is doc_id itself unless a near-duplicate was indexed before.
+        with self._lock:
+            row = self._db.execute("SELECT representative FROM signatures WHERE doc_id = ?",
+                                   (doc_id,)).fetchone()
+            if row:
+                return row[0]
+
+            signature = minhash(text)
+            keys = band_keys(signature)
+            match = self._best_match(signature, keys)
+            representative = match[1] if match else doc_id
+
+            self._db.execute("INSERT INTO signatures VALUES (?, ?, ?)",
+                             (doc_id, signature.tobytes(), representative))
+            self._db.executemany("INSERT INTO bands VALUES (?, ?, ?)",
+                                 [(band, key, doc_id) for band, key in enumerate(keys)])
+            self._db.commit()
+            return representative
+
+    def representative(self, doc_id):
+        with self._lock:
+            row = self._db.execute("SELECT representative FROM signatures WHERE doc_id = ?",
+                                   (doc_id,)).fetchone()
+        return row[0] if row else None
+
+    def _best_match(self, signature, keys):
+        candidates = set()
+        for band, key in enumerate(keys):
+            rows = self._db.execute("SELECT doc_id FROM bands WHERE band = ? AND key = ?", (band, key))
+            candidates.update(row[0] for row in rows)
+
+        best = None
+        for doc_id in candidates:
+            stored, representative = self._db.execute(
+                "SELECT signature, representative FROM signatures WHERE doc_id = ?", (doc_id,)).fetchone()
+            score = similarity(signature, np.frombuffer(stored, dtype=np.uint64))
+            if score >= self.threshold and (best is None or score > best[2]):
+                best = (doc_id, representative, score)
+        return best
+
+
+def split_representatives(articles, known_summary=None):
+    """
+    Splits articles into the ones that need a summary and the near-duplicate copies
+    that can reuse one. Articles carry their cluster representative's URL in
+    'duplicate_of'. A copy whose representative is not among `articles` takes the
+    summary `known_summary(url)` returns for it, or is summarized itself if there is none
+    Returns (representatives, copies) where copies maps a representative URL to its copies
+    """
+    urls = {article.get('url') for article in articles}
+    representatives, copies = [], {}
+
+    for article in articles:
+        original = article.get('duplicate_of')
+        if not original or original == article.get('url'):
+            representatives.append(article)
+        elif original in urls:
+            copies.setdefault(original, []).append(article)
+        else:
+            summary = known_summary(original) if known_summary else None
+            if summary:
+                article['summary'] = summary
+            else:
+                representatives.append(article)
+
+    return representatives, copies
+
+
+def copy_summaries(representatives, copies):
+    # Give every near-duplicate copy its representative's summary
+    for article in representatives:
+        for copy in copies.get(article.get('url'), []):
+            copy['summary'] = article.get('summary', '')
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_near_duplicate_index():
+    # The near-duplicate index of this process, so every article fetched in it is matched
+    # against the same signatures, including those added moments earlier
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = NearDuplicateIndex()
+        return _shared_index
@@ -1,77 +1,394 @@
 import feedparser
-from newspaper import Article
-from newspaper import Config
+import os
 import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlparse
 from datetime import datetime
 
-# Configure newspaper3k for better reliability
-config = Config()
-config.browser_user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-config.request_timeout = 10
+import metrics
+from feed_cache import FeedCache, FEED_CACHE_FILE
+from article_index import canonical_url, content_hash
+from article_record import Article
 
-def get_astronomy_articles():
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+REQUEST_TIMEOUT = 10
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def newspaper_config():
+    """Shared newspaper3k configuration; newspaper is only imported once an article is downloaded"""
+    global _config
+    with _config_lock:
+        if _config is None:
+            from newspaper import Config
+
+            # Configure newspaper3k for better reliability
+            _config = Config()
+            _config.browser_user_agent = USER_AGENT
+            _config.request_timeout = REQUEST_TIMEOUT
+        return _config
+
+
+# Major astronomy RSS feeds
+RSS_FEEDS = [
+    "https://www.nasa.gov/feed/",
+    "https://www.nasa.gov/news-release/feed/",
+    "https://www.astronomy.com/tags/sky-this-week/feed/",
+    "https://www.astronomy.com/tags/news/feed/"
+]  # "https://www.space.com/feeds/all" # Space.com feed can be added if needed (does generate a lot of advert content)
+
+ENTRIES_PER_FEED = 2    # Only the latest entries of each feed are fetched
+MAX_WORKERS = 8         # Total concurrent HTTP requests
+PER_HOST_LIMIT = 2      # Concurrent requests allowed against a single host
+# Processes parsing HTML; 0 parses in the download threads, as on a single core a pool
+# adds pickling and IPC without any parallelism
+EXTRACT_WORKERS = min(4, os.cpu_count() or 1) if (os.cpu_count() or 1) > 1 else 0
+
+# Fast path: article body containers of known sites, tried in order before newspaper's heuristics
+FAST_PATHS = {
+    'nasa.gov': [
+        "//div[contains(concat(' ', normalize-space(@class), ' '), ' entry-content ')]",
+        "//div[contains(@class, 'hds-content')]",
+    ],
+    'astronomy.com': [
+        "//div[contains(@class, 'content-body')]",
+        "//div[contains(@class, 'article-content')]",
+        "//div[contains(concat(' ', normalize-space(@class), ' '), ' entry-content ')]",
+    ],
+}
+MIN_FAST_TEXT = 200     # Shorter fast-path text means the selectors missed; newspaper takes over
+
+
+class HostLimiter:
     """
-    Fetches latest astronomy articles from multiple RSS feeds
-    Returns list of article dictionaries with full content
+    Hands out one bounded semaphore per host so that a worker pool never
+    has more than `limit` requests in flight against the same site
+    """
+
+    def __init__(self, limit=PER_HOST_LIMIT):
+        self.limit = limit
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.limit)
+            return self._semaphores[host]
+
+
+def latest_entries(feed_url, entries):
+    return entries[:ENTRIES_PER_FEED]
+
+
+def fetch_feed(feed_url, limiter, cache=None, select_entries=latest_entries):
+    """
+    Downloads and parses a single RSS feed
+    With a cache, the request carries the stored ETag/Last-Modified validators
+    and a 304 answer is served from the cached entries
+    select_entries(feed_url, entries) picks the entries whose articles are fetched
+    Returns the feed title and the selected entries
+    """
+    print(f"Fetching articles from {feed_url}...")
+    etag, modified = cache.validators(feed_url) if cache else (None, None)
+
+    with limiter(feed_url), metrics.span("feed_fetch", host=urlparse(feed_url).netloc):
+        feed = feedparser.parse(feed_url, etag=etag, modified=modified)
+
+    if cache and feed.get('status') == 304 and cache.get_feed(feed_url):
+        print(f"Feed not modified: {feed_url}")
+        metrics.count("feed_not_modified_total")
+        cached = cache.get_feed(feed_url)
+        return cached['source'], select_entries(feed_url, [feedparser.FeedParserDict(e)
+                                                           for e in cached['entries']])
+
+    source = feed.feed.title
+    if cache:
+        cache.put_feed(feed_url, feed.get('etag'), feed.get('modified'), source, feed.entries)
+    return source, select_entries(feed_url, feed.entries)
+
+
+def download_html(url):
+    """HTML of a page; UTF-8 unless the server names another charset"""
+    import requests
+
+    response = requests.get(url, headers={'User-Agent': USER_AGENT}, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    if 'charset' not in response.headers.get('Content-Type', '').lower():
+        response.encoding = 'utf-8'
+    return response.text
+
+
+def fast_path_selectors(url):
+    host = urlparse(url).netloc.lower()
+    for domain, selectors in FAST_PATHS.items():
+        if host == domain or host.endswith("." + domain):
+            return selectors
+    return None
+
+
+def extract_fast(html, selectors):
+    """Paragraph text and authors from the first selector that finds enough text, or None"""
+    from lxml import html as lxml_html
+
+    tree = lxml_html.fromstring(html)
+    for selector in selectors:
+        paragraphs = []
+        for container in tree.xpath(selector):
+            for paragraph in container.xpath(".//p[not(ancestor::figure)]"):
+                text = " ".join(paragraph.text_content().split())
+                if text:
+                    paragraphs.append(text)
+        text = "\n\n".join(paragraphs)
+        if len(text) >= MIN_FAST_TEXT:
+            authors = tree.xpath("//meta[@name='author']/@content")
+            return text, list(dict.fromkeys(a.strip() for a in authors if a.strip()))
+    return None
+
+
+def extract_article(html, url):
     """
+    Article text and authors from a downloaded page, for running in a worker process
+    Known sites go through their lxml selectors; everything else, and any page the
+    selectors miss, through newspaper3k's generic extraction
+    Returns (text, authors, extractor name)
+    """
+    selectors = fast_path_selectors(url)
+    if selectors:
+        extracted = extract_fast(html, selectors)
+        if extracted:
+            return extracted + ('fast',)
+
+    from newspaper import Article as NewspaperArticle
+
+    article = NewspaperArticle(url, config=newspaper_config())
+    article.download(input_html=html)
+    article.parse()
+    return article.text, article.authors or [], 'newspaper'
+
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+
+
+def get_extract_pool(workers=EXTRACT_WORKERS):
+    # Process pool shared by every scrape in this process; started on first use
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            # Never fork: the download threads are already running. The fork server imports
+            # the parsers once, so every worker it forks starts with them loaded.
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(["news_scrape", "newspaper", "lxml.html"])
+            else:
+                context = multiprocessing.get_context("spawn")
+            _extract_pool = ProcessPoolExecutor(workers, mp_context=context)
+
+            # Start the workers now so they are ready by the time the first pages arrive
+            for _ in range(workers):
+                _extract_pool.submit(warm_up)
+        return _extract_pool
+
 
-    # Major astronomy RSS feeds
-    rss_feeds = [
-        "https://www.nasa.gov/feed/",
-        "https://www.nasa.gov/news-release/feed/",
-        "https://www.astronomy.com/tags/sky-this-week/feed/",
-        "https://www.astronomy.com/tags/news/feed/"
-    ]  # "https://www.space.com/feeds/all" # Space.com feed can be added if needed (does generate a lot of advert content)
+def discard_extract_pool(pool):
+    # Drop a broken pool, so the next scrape starts a new one instead of failing over again
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is pool:
+            _extract_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
 
-    articles = []  # List to hold all articles
 
-    for feed_url in rss_feeds: # iterate through each feed
-        
-        try:
-            print(f"Fetching articles from {feed_url}...")  
-            feed = feedparser.parse(feed_url) #
+def warm_up():
+    # Runs once per worker: import the parsers before any page arrives
+    import lxml.html
+    import newspaper
 
-            for entry in feed.entries[:2]: #get only the latest 5 articles
-                article_url = entry.link
 
+def fetch_article(entry, source, limiter, cache=None, extract_pool=None):
+    """
+    Downloads the article behind a feed entry and extracts its text
+    The HTML is parsed in `extract_pool` when given, so parsing runs on all cores
+    instead of behind the GIL; otherwise in the calling thread
+    Articles already in the cache are returned without touching the network
+    Returns the Article record, its text in the content store, or None if it could
+    not be processed
+    """
+    article_url = entry.link
+
+    cached = cache.get_article(article_url) if cache else None
+    if cached is not None:
+        metrics.count("article_cache_hits_total")
+        return Article.from_dict(cached)
+
+    host = urlparse(article_url).netloc
+    try:
+        with limiter(article_url), metrics.span("html_download", host=host):
+            html = download_html(article_url)
+        with metrics.span("html_parse", host=host):
+            extracted = None
+            if extract_pool is not None:
                 try:
-                    article = Article(article_url, config=Config())
-                    article.download()
-                    article.parse()
-                    
-                    # Extracting article data
-                    article_data = {
-                        'title': entry.title,
-                        'url': article_url,
-                        'published': entry.published if 'published' in entry else None,
-                        'content': article.text,
-                        'summary': "",
-                        'authors': article.authors if article.authors else [],
-                        'source': feed.feed.title
-                    }
-                    if(article_data['title'] in [a['title'] for a in articles]):
-                        print(f"Skipping duplicate article: {article_data['title']}")
-                        continue
-                    articles.append(article_data)
-
-                    # time.sleep(1) # Respectful delay between requests
-
-                except Exception as e:
-                    print(f"Error processing article {article_url}: {e}")
-                    continue
-
-        except Exception as e:
-            print(f"Error fetching feed {feed_url}: {e}")
-            continue
-        
-    return articles
+                    extracted = extract_pool.submit(extract_article, html, article_url).result()
+                except BrokenProcessPool:
+                    print("Extraction workers unavailable, parsing in this process")
+                    discard_extract_pool(extract_pool)
+            text, authors, extractor = extracted or extract_article(html, article_url)
+        metrics.count("articles_extracted_total", extractor=extractor)
+
+        # Extracting article data
+        article_data = Article.from_dict({
+            'title': entry.title,
+            'url': article_url,
+            'published': entry.published if 'published' in entry else None,
+            'content': text,
+            'summary': "",
+            'authors': authors,
+            'source': source
+        })
+        if cache:
+            cache.put_article(article_url, article_data.to_record())
+        return article_data
+
+    except Exception as e:
+        print(f"Error processing article {article_url}: {e}")
+        metrics.count("article_failures_total", host=host)
+        return None
+
+
+def iter_astronomy_articles(rss_feeds=None, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                            cache_file=FEED_CACHE_FILE, ordered=True, index=None, new_only=False,
+                            near_duplicates=None, extract_workers=EXTRACT_WORKERS,
+                            select_entries=latest_entries, on_fetched=None):
+    """
+    Streams the latest astronomy articles from multiple RSS feeds
+    Only the entries picked by select_entries(feed_url, entries) are fetched; by
+    default the first ENTRIES_PER_FEED of each feed. on_fetched(feed_url, entry,
+    article) is called as each download finishes, with None for a failed one
+    Feeds and articles are downloaded concurrently and each article is yielded as
+    soon as it is parsed. With `ordered`, articles come out in feed order and entry
+    order inside each feed; otherwise in completion order
+    Article HTML is parsed in the shared pool of worker processes (pass
+    extract_workers=0 to parse in the download threads instead)
+    Feed validators and parsed articles are kept in `cache_file` between runs
+    (pass None to disable the cache)
+    Duplicates by title, canonical URL or content are dropped within a run. With an
+    ArticleIndex, every article is also ingested into it, and `new_only` skips the
+    ones an earlier run already indexed. With a NearDuplicateIndex, articles whose
+    content closely matches an earlier one get its URL in 'duplicate_of'
+    Yields Article records, whose content loads from the content store on demand
+    """
+    if rss_feeds is None:
+        rss_feeds = RSS_FEEDS
+
+    cache = FeedCache(cache_file) if cache_file else None
+    limiter = HostLimiter(per_host_limit)
+    extract_pool = get_extract_pool(extract_workers) if extract_workers else None
+    seen = set()  # titles, canonical URLs and content hashes of this run's articles
+
+    def is_new(article_data):
+        if article_data is None:
+            return False
+        content = article_data.get('content', '')
+        keys = {('title', article_data['title']), ('url', canonical_url(article_data['url']))}
+        if content.strip():
+            keys.add(('content', content_hash(content)))
+        if not seen.isdisjoint(keys):
+            print(f"Skipping duplicate article: {article_data['title']}")
+            metrics.count("duplicate_articles_total", kind="exact")
+            return False
+        seen.update(keys)
+
+        if index is not None and not index.add(article_data) and new_only:
+            print(f"Skipping already indexed article: {article_data['title']}")
+            return False
+
+        if near_duplicates is not None and content.strip():
+            representative = near_duplicates.add(article_data['url'], content)
+            if representative != article_data['url']:
+                print(f"Near-duplicate of {representative}: {article_data['title']}")
+                metrics.count("duplicate_articles_total", kind="near")
+                article_data['duplicate_of'] = representative
+        return True
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            feed_futures = {pool.submit(fetch_feed, url, limiter, cache, select_entries): n
+                            for n, url in enumerate(rss_feeds)}
+            feed_articles = [None] * len(rss_feeds)  # article futures of each feed, once parsed
+            origins = {}  # article future -> (feed url, entry)
+            pending = set(feed_futures)
+            next_feed, next_entry = 0, 0  # next article to emit in ordered mode
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future in feed_futures:
+                        # Queue the article downloads of a feed as soon as it is parsed
+                        n = feed_futures[future]
+                        try:
+                            source, entries = future.result()
+                        except Exception as e:
+                            print(f"Error fetching feed {rss_feeds[n]}: {e}")
+                            metrics.count("feed_failures_total")
+                            entries = []
+                        feed_articles[n] = [pool.submit(fetch_article, entry, source, limiter, cache,
+                                                        extract_pool)
+                                            for entry in entries]
+                        origins.update((f, (rss_feeds[n], entry)) for f, entry in zip(feed_articles[n], entries))
+                        pending.update(feed_articles[n])
+
+                    else:
+                        if on_fetched is not None:
+                            on_fetched(*origins[future], future.result())
+                        if not ordered and is_new(future.result()):
+                            yield future.result()
+
+                # Emit every article whose predecessors are all done
+                while ordered and next_feed < len(rss_feeds) and feed_articles[next_feed] is not None:
+                    futures = feed_articles[next_feed]
+                    if next_entry == len(futures):
+                        next_feed, next_entry = next_feed + 1, 0
+                    elif futures[next_entry].done():
+                        article_data = futures[next_entry].result()
+                        next_entry += 1
+                        if is_new(article_data):
+                            yield article_data
+                    else:
+                        break
+    finally:
+        if cache:
+            cache.save()
+        metrics.flush()
+
+
+def get_astronomy_articles(rss_feeds=None, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                           cache_file=FEED_CACHE_FILE, index=None, new_only=False, near_duplicates=None,
+                           extract_workers=EXTRACT_WORKERS):
+    """
+    Fetches latest astronomy articles from multiple RSS feeds
+    Returns list of Article records, in feed order
+    """
+    return list(iter_astronomy_articles(rss_feeds, max_workers, per_host_limit, cache_file,
+                                        index=index, new_only=new_only,
+                                        near_duplicates=near_duplicates,
+                                        extract_workers=extract_workers))
 
 
 if __name__ == "__main__":
+    start = time.perf_counter()
     articles = get_astronomy_articles()
-    print(f"\nTotal articles collected: {len(articles)}")
+    print(f"\nTotal articles collected: {len(articles)} in {time.perf_counter() - start:.2f}s")
 
-    print(articles[0])
+    print(dict(articles[0]))
 
     # for article in articles:
     #     print(f"\nSample Article:")
@@ -1,18 +1,31 @@
-from transformers import pipeline, AutoTokenizer
 import os
-import json
-from news_scrape import get_astronomy_articles
+import re
+import gc
+import threading
+import metrics
+from news_scrape import get_astronomy_articles, iter_astronomy_articles
+from summary_cache import get_summary_cache, cache_key
+from article_store import get_store, SUMMARIES_STORE
+from article_index import get_article_index, is_summary
+from article_record import Article
+from near_duplicates import get_near_duplicate_index, split_representatives, copy_summaries
 from datetime import datetime
 
+MODEL_NAME = "Falconsai/text_summarization"
+MODEL_DIR = "local_falconsai_model"
+SUMMARY_FILE = "astronomy_summaries_falconsai.json"  # Whole-file JSON used before the store
+MIN_CONTENT_LENGTH = 50  # Characters an article needs, whitespace aside, to be summarized
 
-def setup_local_model():
-    model_dir = "local_falconsai_model"
+# Process-wide registry of loaded models: (model_dir, backend) -> (summarizer, tokenizer)
+_model_registry = {}
+_registry_lock = threading.Lock()
 
+
+def setup_local_model(model_dir=MODEL_DIR, model_name=MODEL_NAME):
     if not os.path.exists(model_dir):
         print("First time setup: Downloading model...")
         from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 
-        model_name = "Falconsai/text_summarization"
         model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
         tokenizer = AutoTokenizer.from_pretrained(model_name)
 
@@ -24,192 +37,640 @@ def setup_local_model():
         print("Model already exists locally!")
 
 
-def load_local_summarizer():
-    # Load the summarization pipeline using the local model
-    model_dir = "local_falconsai_model"
+def load_torch_summarizer(model_dir):
+    # Full-precision PyTorch pipeline
+    from transformers import pipeline
+
     return pipeline("summarization", model=model_dir, tokenizer=model_dir)
 
 
-def chunkify(text, tokenizer, max_tokens=400):
-    # Split text into chunks based on sentence boundaries, ensuring each chunk is under max_tokens
-    sentences = text.split('.')
-    chunks = []
-    current_chunk = ""
+def load_int8_summarizer(model_dir):
+    # PyTorch pipeline with the Linear layers dynamically quantized to int8 for CPU inference
+    import torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
 
-    # Iterate through sentences and build chunks
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_dir)
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline("summarization", model=model, tokenizer=AutoTokenizer.from_pretrained(model_dir))
+
+
+def load_onnx_summarizer(model_dir):
+    # ONNX Runtime pipeline; the model is exported to model_dir + "_onnx" on first use
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError:
+        raise ImportError("The onnx backend needs optimum: pip install optimum[onnxruntime]")
+    from transformers import AutoTokenizer, pipeline
+
+    onnx_dir = model_dir + "_onnx"
+    if not os.path.exists(onnx_dir):
+        print(f"Exporting {model_dir} to ONNX...")
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_dir, export=True)
+        model.save_pretrained(onnx_dir)
+        AutoTokenizer.from_pretrained(model_dir).save_pretrained(onnx_dir)
+        print(f"ONNX model saved to {onnx_dir}")
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(onnx_dir)
+    return pipeline("summarization", model=model, tokenizer=AutoTokenizer.from_pretrained(onnx_dir))
+
+
+# Inference backends: name -> loader returning a summarization pipeline
+BACKENDS = {
+    'torch': load_torch_summarizer,
+    'int8': load_int8_summarizer,
+    'onnx': load_onnx_summarizer,
+}
+INFERENCE_BACKEND = os.getenv("SUMMARIZER_BACKEND", "torch")
+
+
+def model_id_for(backend=None):
+    # Model identifier for the summary cache; outputs of different backends are kept apart
+    backend = backend or INFERENCE_BACKEND
+    return MODEL_NAME if backend == 'torch' else f"{MODEL_NAME}@{backend}"
+
+
+def load_local_summarizer(model_dir=MODEL_DIR, backend=None):
+    # Load the summarization pipeline using the local model and the chosen inference backend
+    backend = backend or INFERENCE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, choose from {sorted(BACKENDS)}")
+    return BACKENDS[backend](model_dir)
+
+
+def get_local_model(model_dir=MODEL_DIR, backend=None):
+    # Return the shared (summarizer, tokenizer) pair for model_dir and backend.
+    # Weights are loaded on first use only; every later caller in the process gets the same
+    # instances. The tokenizer is the one the pipeline already loaded.
+    key = (model_dir, backend or INFERENCE_BACKEND)
+    with _registry_lock:
+        if key not in _model_registry:
+            setup_local_model(model_dir)
+            summarizer = load_local_summarizer(model_dir, key[1])
+            _model_registry[key] = (summarizer, summarizer.tokenizer)
+        return _model_registry[key]
+
+
+def unload_local_model(model_dir=None):
+    # Drop a loaded model (or all of them when model_dir is None) so its memory can be reclaimed
+    with _registry_lock:
+        for key in list(_model_registry):
+            if model_dir is None or key[0] == model_dir:
+                del _model_registry[key]
+    gc.collect()
+
+
+# Sentence ends: terminal punctuation (plus closing quotes/brackets) followed by whitespace and
+# the start of a new sentence, or a paragraph break. Decimals like "3.5" never match.
+SENTENCE_BOUNDARY = re.compile(r'(?P<end>[.!?]["\'”’)\]]*)\s+(?=["\'“‘(\[]?[A-Z0-9])|\n\s*\n')
+
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+# Words ending in '.' that do not end a sentence
+ABBREVIATIONS = {
+    'dr', 'mr', 'mrs', 'ms', 'prof', 'sr', 'jr', 'st', 'mt', 'ft', 'no', 'vs', 'etc',
+    'e.g', 'i.e', 'u.s', 'u.k', 'a.m', 'p.m', 'jan', 'feb', 'mar', 'apr', 'jun', 'jul',
+    'aug', 'sep', 'sept', 'oct', 'nov', 'dec', 'approx', 'fig', 'inc', 'corp', 'ltd'
+}
+
+
+def split_sentences(text):
+    # Return (start, end) character spans of the sentences in text
+    spans = []
+    start = 0
+
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        before = text[start:match.start() + 1]
+        last_word = before.split()[-1].rstrip('.').lower() if before.split() else ''
+        if (match.group().startswith('.') and (last_word in ABBREVIATIONS or len(last_word) == 1)
+                and not PARAGRAPH_BREAK.search(match.group())):
+            continue  # "Dr. Smith", "J. Webb", but not "8:24 P.M." at the end of a paragraph
+
+        spans.append((start, match.end('end') if match.group('end') else match.start()))
+        start = match.end()
+
+    if start < len(text):
+        spans.append((start, len(text)))
+
+    # Drop whitespace-only spans and trim the rest
+    trimmed = []
+    for start, end in spans:
+        sentence = text[start:end]
+        if sentence.strip():
+            lead = len(sentence) - len(sentence.lstrip())
+            trimmed.append((start + lead, start + len(sentence.rstrip())))
+    return trimmed
+
+
+def count_sentence_tokens(text, spans, tokenizer):
+    # Token count of every sentence span, from a single tokenizer pass when offsets are available
+    if not getattr(tokenizer, 'is_fast', False):
+        return [len(tokenizer.tokenize(text[start:end])) for start, end in spans]
+
+    offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                        verbose=False)['offset_mapping']
+    counts = [0] * len(spans)
+    sentence = 0
+
+    # Walk tokens and sentences together; both are sorted by position
+    for token_start, token_end in offsets:
+        while sentence < len(spans) and token_start >= spans[sentence][1]:
+            sentence += 1
+        if sentence == len(spans):
+            break
+        if token_end > spans[sentence][0]:
+            counts[sentence] += 1
+    return counts
+
+
+def chunkify(text, tokenizer, max_tokens=400, overlap=0):
+    # Split text into chunks of whole sentences, each at most max_tokens tokens long.
+    # The article is tokenized once and chunks are built from cumulative sentence token
+    # counts, so this is linear in the article length. With overlap > 0, each chunk starts
+    # with the trailing sentences of the previous chunk, up to overlap tokens.
+    spans = split_sentences(text)
+    counts = count_sentence_tokens(text, spans, tokenizer)
 
-        test_chunk = current_chunk + ". " + sentence if current_chunk else sentence
-        tokens = tokenizer.tokenize(test_chunk)
+    chunks = []
+    current = []        # sentence indices in the current chunk
+    current_tokens = 0
+
+    for i, count in enumerate(counts):
+        # A sentence that cannot fit any chunk goes out on its own, to be truncated by the model
+        if count > max_tokens:
+            if current:
+                chunks.append(current)
+            chunks.append([i])
+            current, current_tokens = [], 0
+            continue
 
         # If adding this sentence exceeds max_tokens, save current chunk and start a new one
-        if len(tokens) <= max_tokens:
-            current_chunk = test_chunk
-        else:
-            # Save the current chunk if it's not empty
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = sentence
+        if current_tokens + count > max_tokens:
+            chunks.append(current)
+
+            # Carry trailing sentences over while they fit in the overlap budget
+            carried, carried_tokens = [], 0
+            for j in reversed(current):
+                if carried_tokens + counts[j] > overlap or carried_tokens + counts[j] + count > max_tokens:
+                    break
+                carried.insert(0, j)
+                carried_tokens += counts[j]
+            current, current_tokens = carried, carried_tokens
+
+        current.append(i)
+        current_tokens += count
 
     # Add the last chunk if it exists
-    if current_chunk:
-        chunks.append(current_chunk)
+    if current:
+        chunks.append(current)
 
-    return chunks
+    return [text[spans[c[0]][0]:spans[c[-1]][1]] for c in chunks]
 
 
-def summarize_single_article(article_content, summarizer=None, tokenizer=None):
-    # Summarize a single article content using the provided summarizer and tokenizer.
+BATCH_SIZE = 8  # Number of texts sent through the model together
 
-    if summarizer is None or tokenizer is None:
-        setup_local_model()
-        tokenizer = AutoTokenizer.from_pretrained("local_falconsai_model")
-        summarizer = load_local_summarizer()
+# Generation length limits for each kind of model call; the actual lengths scale with the input
+DIRECT_PARAMS = {'max_length': 120, 'min_length': 30}
+CHUNK_PARAMS = {'max_length': 80, 'min_length': 20}
+COMBINE_PARAMS = {'max_length': 120, 'min_length': 40}
 
-    # Check if article is short enough to summarize directly
-    tokens = tokenizer.tokenize(article_content)
+# Map-reduce settings
+MAX_INPUT_TOKENS = 400  # Longest text sent to the model in one piece; safe margin under 512
+LENGTH_RATIO = 0.3      # Generated tokens per input token, before the limits above apply
+LENGTH_STEP = 16        # Generation lengths are rounded up to a multiple of this so batches can share them
+MIN_GENERATION = 16     # Shortest max_length ever requested
+MAX_LEVELS = 4          # Reduce rounds before a summary is forced through a final pass
 
-    if len(tokens) <= 400:  # Safe margin under 512
-        try:
-            # Direct summarization for short articles
-            summary = summarizer(
-                article_content,
-                max_length=120,
-                min_length=30,
-                do_sample=False,
-                truncation=True
-            )
-            return summary[0]['summary_text']
-        except Exception as e:
-            print(f"Direct summarization failed: {e}")
-            return "Summary generation failed."
+# Longer articles are cut down to their most salient sentences, up to this many tokens, before
+# the model sees them, so they need a single model call. Off (0) by default, leaving long
+# articles to the map-reduce tree, until benchmarks/bench_extractive.py has shown the summaries
+# stay comparable; MAX_INPUT_TOKENS is the value to try.
+EXTRACTIVE_TOKENS = int(os.getenv("SUMMARIZER_EXTRACTIVE_TOKENS", "0"))
 
-    # Article is too long, chunk it
-    print(f"Article too long ({len(tokens)} tokens), chunking...")
-    # Split into manageable chunks
-    chunks = chunkify(article_content, tokenizer, max_tokens=400)
 
-    if not chunks:
-        return "Could not chunk article for summarization."
+def run_batched(summarizer, texts, batch_size=BATCH_SIZE, **params):
+    # Summarize a list of texts in length-bucketed batches, returning results in input order.
+    # Texts of similar length are batched together to keep padding low.
+    # A failed batch is retried text by text; texts that still fail come back as None.
+    results = [None] * len(texts)
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
 
-    chunk_summaries = []
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        batch = [texts[i] for i in bucket]
 
-    # Process each chunk and summarize
-    for i, chunk in enumerate(chunks):
         try:
-            print(f"  Summarizing chunk {i+1}/{len(chunks)}")
-            summary = summarizer(
-                chunk,
-                max_length=80,
-                min_length=20,
-                do_sample=False,
-                truncation=True
-            )
-            chunk_summaries.append(summary[0]['summary_text'])
+            with metrics.span("generate"):
+                outputs = summarizer(batch, batch_size=len(batch), do_sample=False,
+                                     truncation=True, **params)
+            for i, output in zip(bucket, outputs):
+                results[i] = output['summary_text']
+            record_generated(summarizer, [results[i] for i in bucket])
         except Exception as e:
-            print(f"  Chunk {i+1} failed: {e}")
-            continue
+            print(f"  Batch of {len(batch)} failed ({e}), retrying one by one")
+            metrics.count("generate_retries_total", len(bucket))
+            for i in bucket:
+                try:
+                    with metrics.span("generate"):
+                        output = summarizer(texts[i], do_sample=False, truncation=True, **params)
+                    results[i] = output[0]['summary_text']
+                    record_generated(summarizer, [results[i]])
+                except Exception as e:
+                    print(f"  Summarization failed: {e}")
+
+    return results
+
+
+def record_generated(summarizer, summaries):
+    # Count generated texts and tokens (for tokens/sec); the tokenizing only happens with metrics on
+    if not metrics.enabled():
+        return
+    metrics.count("generated_texts_total", len(summaries))
+    tokenizer = getattr(summarizer, 'tokenizer', None)
+    if tokenizer is not None:
+        metrics.count("generated_tokens_total", sum(len(tokenizer.tokenize(s)) for s in summaries))
+
+
+def summary_cache_key(content, model_id=None):
+    # Summary cache key for content summarized with model_id (by default the current backend's)
+    # and the current generation settings
+    return cache_key(content, model_id or model_id_for(), direct=DIRECT_PARAMS, chunk=CHUNK_PARAMS,
+                     combine=COMBINE_PARAMS, max_input=MAX_INPUT_TOKENS, ratio=LENGTH_RATIO,
+                     step=LENGTH_STEP, min_generation=MIN_GENERATION, levels=MAX_LEVELS,
+                     extractive=EXTRACTIVE_TOKENS)
+
+
+def summarize_articles_batched(contents, summarizer=None, tokenizer=None, batch_size=BATCH_SIZE,
+                               use_cache=True, model_id=None):
+    # Summarize many article contents at once.
+    # Contents already summarized with the same model and generation settings are served
+    # from the summary cache; only the rest go through the model. Without a summarizer,
+    # the shared local model is loaded, but only once there is a cache miss.
+    return summarize_articles_checked(contents, summarizer, tokenizer, batch_size, use_cache, model_id)[0]
+
+
+def summarize_articles_checked(contents, summarizer=None, tokenizer=None, batch_size=BATCH_SIZE,
+                               use_cache=True, model_id=None):
+    # Like summarize_articles_batched, but also returns whether each summary succeeded;
+    # failed texts carry a failure message in place of their summary
+    if not use_cache:
+        if summarizer is None or tokenizer is None:
+            summarizer, tokenizer = get_local_model()
+        return run_summarization(contents, summarizer, tokenizer, batch_size)
+
+    cache = get_summary_cache()
+    keys = [summary_cache_key(content, model_id) for content in contents]
+    summaries = [cache.get(key) for key in keys]
+    succeeded = [True] * len(contents)
+    misses = [i for i, summary in enumerate(summaries) if summary is None]
+
+    if len(misses) < len(contents):
+        print(f"  {len(contents) - len(misses)} summaries served from cache")
+    metrics.count("summary_cache_hits_total", len(contents) - len(misses), source="local")
+    metrics.count("summary_cache_misses_total", len(misses), source="local")
+
+    if misses:
+        if summarizer is None or tokenizer is None:
+            summarizer, tokenizer = get_local_model()
+        outputs, oks = run_summarization(
+            [contents[i] for i in misses], summarizer, tokenizer, batch_size)
+        for i, output, ok in zip(misses, outputs, oks):
+            summaries[i], succeeded[i] = output, ok
+            if ok:
+                cache.put(keys[i], output)
+    else:
+        cache.flush()
+
+    return summaries, succeeded
+
+
+def generation_params(n_tokens, limits):
+    # Generation lengths for a text of n_tokens: proportional to the input, within limits
+    scaled = -(-int(n_tokens * LENGTH_RATIO) // LENGTH_STEP) * LENGTH_STEP
+    max_length = min(limits['max_length'], max(MIN_GENERATION, scaled))
+    return {'max_length': max_length, 'min_length': min(limits['min_length'], max_length // 2)}
+
+
+def run_grouped(summarizer, jobs, batch_size=BATCH_SIZE):
+    # Run (text, params) jobs through run_batched, one call per distinct set of params
+    results = [None] * len(jobs)
+    groups = {}
+    for i, (_, params) in enumerate(jobs):
+        groups.setdefault(tuple(sorted(params.items())), []).append(i)
+
+    for params, indices in groups.items():
+        outputs = run_batched(summarizer, [jobs[i][0] for i in indices], batch_size, **dict(params))
+        for i, output in zip(indices, outputs):
+            results[i] = output
+    return results
+
+
+def extract_salient(text, tokenizer, budget=EXTRACTIVE_TOKENS):
+    # The most salient sentences of text, in their original order, within budget tokens
+    from extractive import select_sentences
+
+    with metrics.span("extract"):
+        spans = split_sentences(text)
+        counts = count_sentence_tokens(text, spans, tokenizer)
+        chosen = select_sentences([text[start:end] for start, end in spans], counts, budget)
+    return " ".join(text[spans[i][0]:spans[i][1]] for i in chosen) or text
+
+
+def truncate_tokens(text, tokenizer, max_tokens):
+    # The first max_tokens tokens of text, as text
+    tokens = tokenizer.tokenize(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return tokenizer.convert_tokens_to_string(tokens[:max_tokens]) + "..."
+
+
+def run_summarization(contents, summarizer, tokenizer, batch_size=BATCH_SIZE, streamer=None):
+    # Summarize contents with the model, returning the summaries and whether each succeeded.
+    # Hierarchical map-reduce, one level at a time across all articles so every level is
+    # batched: a text that fits the model input is summarized directly (the final pass);
+    # a longer one is split into chunks whose summaries are joined and reduced again,
+    # until what is left fits. Generation lengths scale with each input's token count,
+    # and a text no longer than the summary it would get is kept as it is.
+    # A streamer receives the tokens of the final pass as they are generated.
+    summaries = [None] * len(contents)
+    succeeded = [True] * len(contents)
+    current = dict(enumerate(contents))  # article index -> text still to be reduced
+    level = 0
+
+    while current:
+        finals = []         # (article index, params)
+        chunk_jobs = []     # (article index, chunk, params, kept as it is)
+        limits = DIRECT_PARAMS if level == 0 else COMBINE_PARAMS
+        for i, text in current.items():
+            with metrics.span("tokenize"):
+                n_tokens = len(tokenizer.tokenize(text))
+            if level == 0:
+                metrics.count("input_tokens_total", n_tokens)
+
+            # Extractive stage: long articles keep only their most salient sentences
+            if level == 0 and 0 < EXTRACTIVE_TOKENS < n_tokens:
+                text = current[i] = extract_salient(text, tokenizer, EXTRACTIVE_TOKENS)
+                kept = len(tokenizer.tokenize(text))
+                print(f"Article too long ({n_tokens} tokens), kept {kept} tokens of salient sentences")
+                n_tokens = kept
+
+            # An article shorter than its minimum summary, or joined chunk summaries already
+            # within the final length, need no (further) pass
+            if n_tokens <= limits['min_length' if level == 0 else 'max_length']:
+                summaries[i] = text
+            elif n_tokens <= MAX_INPUT_TOKENS or level >= MAX_LEVELS:
+                params = generation_params(n_tokens, limits)
+                if streamer is not None:
+                    params['streamer'] = streamer
+                finals.append((i, params))
+            else:
+                if level == 0:
+                    print(f"Article too long ({n_tokens} tokens), chunking...")
+                with metrics.span("tokenize"):
+                    chunks = chunkify(text, tokenizer, max_tokens=MAX_INPUT_TOKENS)
+                if not chunks:
+                    summaries[i] = "Could not chunk article for summarization."
+                    succeeded[i] = False
+                for chunk in chunks:
+                    chunk_tokens = len(tokenizer.tokenize(chunk))
+                    params = generation_params(chunk_tokens, CHUNK_PARAMS)
+                    chunk_jobs.append((i, chunk, params, chunk_tokens <= params['max_length']))
+
+        if finals:
+            print(f"  Summarizing {len(finals)} {'short articles' if level == 0 else 'combined summaries'}")
+            outputs = run_grouped(summarizer, [(current[i], params) for i, params in finals], batch_size)
+            for (i, _), output in zip(finals, outputs):
+                if output is not None:
+                    summaries[i] = output
+                elif level == 0:
+                    summaries[i], succeeded[i] = "Summary generation failed.", False
+                else:
+                    summaries[i] = truncate_tokens(current[i], tokenizer, COMBINE_PARAMS['max_length'])
+                    succeeded[i] = False
+
+        # Map: summarize the chunks of every long text together; short chunks pass through
+        to_run = [(chunk, params) for _, chunk, params, kept in chunk_jobs if not kept]
+        if to_run:
+            print(f"  Summarizing {len(to_run)} chunks from {len({job[0] for job in chunk_jobs})} "
+                  f"long texts (level {level})")
+        outputs = iter(run_grouped(summarizer, to_run, batch_size))
+
+        reduced = {}  # article index -> chunk summaries, in chunk order
+        for i, chunk, _, kept in chunk_jobs:
+            output = chunk if kept else next(outputs)
+            reduced.setdefault(i, [])
+            if output is not None:
+                reduced[i].append(output)
+
+        # Reduce: the joined chunk summaries become the next level's input
+        current = {}
+        for i, parts in reduced.items():
+            if parts:
+                current[i] = " ".join(parts)
+            else:
+                summaries[i] = "All chunks failed to summarize."
+                succeeded[i] = False
+        level += 1
+
+    return summaries, succeeded
+
 
-    if not chunk_summaries:
-        return "All chunks failed to summarize."
+def summarize_single_article(article_content, summarizer=None, tokenizer=None):
+    # Summarize a single article content using the provided summarizer and tokenizer.
+    # Without them, the shared local model is loaded only if the summary is not cached.
+    return summarize_articles_batched([article_content], summarizer, tokenizer)[0]
+
+
+def stream_summary(content, summarizer=None, tokenizer=None):
+    # Yield the summary of one article piece by piece as the local model writes it.
+    # Generation runs in a background thread feeding a TextIteratorStreamer; a cached
+    # summary, or a text that needs no final model pass, is yielded whole. Raises when
+    # the model failed, instead of yielding its failure message.
+    from transformers import TextIteratorStreamer
+
+    cache = get_summary_cache()
+    key = summary_cache_key(content)
+    cached = cache.get(key)
+    metrics.count("summary_cache_hits_total" if cached is not None else "summary_cache_misses_total",
+                  source="local")
+    if cached is not None:
+        yield cached
+        return
 
-    # Combine chunk summaries
-    combined_summary = " ".join(chunk_summaries)
+    if summarizer is None or tokenizer is None:
+        summarizer, tokenizer = get_local_model()
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True,
+                                    clean_up_tokenization_spaces=False)
+    result = {}
 
-    # If combined summary is still too long, summarize it again
-    combined_tokens = tokenizer.tokenize(combined_summary)
-    if len(combined_tokens) > 400:
+    def generate():
         try:
-            print("  Final summarization of combined chunks...")
-            final_summary = summarizer(
-                combined_summary,
-                max_length=120,
-                min_length=40,
-                do_sample=False,
-                truncation=True
-            )
-            return final_summary[0]['summary_text']
+            summaries, succeeded = run_summarization([content], summarizer, tokenizer, streamer=streamer)
+            result['summary'], result['ok'] = summaries[0], succeeded[0]
         except Exception as e:
-            print(f"  Final summarization failed: {e}")
-            return combined_summary[:500] + "..."
-
-    return combined_summary
+            result['error'] = e
+        finally:
+            streamer.end()
+
+    thread = threading.Thread(target=generate, daemon=True)
+    thread.start()
+    streamed = False
+    for piece in streamer:
+        if piece:
+            streamed = True
+            yield piece
+    thread.join()
+
+    if 'error' in result:
+        raise result['error']
+    if not result['ok']:
+        raise RuntimeError(result['summary'])
+    if not streamed:
+        yield result['summary']
+    cache.put(key, result['summary'])
+
+
+def clean_article(article):
+    # Article in the structured format used by the summary files; the content is
+    # referenced in the content store rather than copied
+    record = Article.from_dict(article)
+    return {
+        'title': article.get('title', ''),
+        'url': article.get('url', ''),
+        'source': article.get('source', ''),
+        'published': str(article.get('published', '')),
+        'content_ref': record.content_ref,
+        'content_length': record.content_length or 0,
+        'summary': article.get('summary', 'No summary available'),
+        'processed_at': datetime.now().isoformat()
+    }
+
+
+def save_articles_to_store(articles, path=SUMMARIES_STORE):
+    # Append articles to the summary store in a structured format
+    articles = Article.from_dicts(articles)
+    json_ready_articles = [clean_article(article) for article in articles]
+    get_store(path, legacy_json=SUMMARY_FILE).extend(json_ready_articles)
+    get_article_index().add_many(articles)
+
+    print(f"✅ Saved {len(json_ready_articles)} articles to {path}")
+    return json_ready_articles
 
 
-def save_articles_to_json(articles, filename="astronomy_summaries_falconsai.json"):
-    # Save articles to a JSON file in a structured format
-    json_ready_articles = []
+def too_short(article):
+    # True for an article with no content worth summarizing; every summarizing path skips these
+    return not article.get('content') or len(article['content'].strip()) < MIN_CONTENT_LENGTH
 
-    # Ensure the output directory exists
-    for article in articles:
-        clean_article = {
-            'title': article.get('title', ''),
-            'url': article.get('url', ''),
-            'source': article.get('source', ''),
-            'published': str(article.get('published', '')),
-            'content': article.get('content', ''),
-            'content_length': len(article.get('content', '')),
-            'summary': article.get('summary', 'No summary available'),
-            'processed_at': datetime.now().isoformat()
-        }
-        json_ready_articles.append(clean_article)
-
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(json_ready_articles, f, indent=4, ensure_ascii=False)
-
-    print(f"✅ Saved {len(json_ready_articles)} articles to {filename}")
-    return json_ready_articles
 
+def indexed_summary(url):
+    # Summary recorded in the article index for url, if it has an actual one
+    article = get_article_index().get(url)
+    return article['summary'] if article and is_summary(article['summary']) else None
 
-def summarize_all_articles():
-    # Main function to summarize all articles
-    setup_local_model()
 
-    tokenizer = AutoTokenizer.from_pretrained("local_falconsai_model")
-    summarizer = load_local_summarizer()
+def summarize_stream(articles, summarizer=None, tokenizer=None, known_summary=indexed_summary):
+    # Summarize articles one by one as they arrive from any iterable, yielding each as soon as
+    # its summary is ready. Nothing is accumulated, so memory does not grow with the batch.
+    # Near-duplicates reuse their representative's summary when known_summary has it.
+    # Without a summarizer, the model is loaded when the first article needs it.
+    from summarizer_router import summarize_contents
 
+    for article in articles:
+        reused = known_summary(article['duplicate_of']) if article.get('duplicate_of') else None
+        if reused:
+            article['summary'] = reused
+        elif too_short(article):
+            article['summary'] = "Content too short"
+        else:
+            try:
+                article['summary'] = summarize_contents([article['content']], summarizer, tokenizer)[0]
+            except Exception as e:
+                article['summary'] = f"Error: {str(e)}"
+        yield article
+
+
+def stream_all_articles(path=SUMMARIES_STORE):
+    # Fetch, summarize and save articles as a stream: each article is summarized as soon as it
+    # is parsed and appended to the store as soon as its summary is ready
+    store = get_store(path, legacy_json=SUMMARY_FILE)
+    index = get_article_index()
+
+    print("Streaming articles...")
+    count = 0
+    articles = iter_astronomy_articles(index=index, near_duplicates=get_near_duplicate_index())
+    for article in summarize_stream(articles):
+        count += 1
+        store.append(clean_article(article))
+        index.add(article)
+        print(f"✅ {count}. {article['title']}")
+        print(f"   Summary: {article['summary']}")
+        print("=" * 60)
+
+    print(f"✅ Saved {count} articles to {path}")
+    metrics.flush()
+    return count
+
+
+def summarize_all_articles(workers=1):
+    # Main function to summarize all articles
+    # With workers > 1, inference is spread over that many processes
     print("Loading articles...")
-    articles = get_astronomy_articles()
+    articles = get_astronomy_articles(index=get_article_index(),
+                                      near_duplicates=get_near_duplicate_index())
 
     if not articles:
         print("No articles found!")
         return []
 
+    # The model is only loaded once there is something to summarize
+    summarizer, tokenizer = get_local_model()
+
     print(f"Found {len(articles)} articles to summarize\n")
 
-    # Process each article
+    # Pick the articles worth summarizing
+    to_summarize = []
     for i, article in enumerate(articles, 1):
-        try:
-            if not article.get('content') or len(article['content'].strip()) < 50:
-                print(f"Skipping article {i}: Content too short")
-                continue
-
-            print(f"🔄 Processing Article {i}/{len(articles)}")
-            print(f"📰 Title: {article['title']}")
-
-            tokens = tokenizer.tokenize(article['content'])
-            print(
-                f"📊 Content: {len(article['content'])} chars, {len(tokens)} tokens")
-
-            # Summarize the article
-            summary = summarize_single_article(
-                article['content'], summarizer, tokenizer)
+        if too_short(article):
+            print(f"Skipping article {i}: Content too short")
+            continue
 
-            # Store and display summary
+        tokens = tokenizer.tokenize(article['content'])
+        print(f"📰 Article {i}/{len(articles)}: {article['title']}")
+        print(
+            f"📊 Content: {len(article['content'])} chars, {len(tokens)} tokens")
+        to_summarize.append(article)
+
+    # Only one article per near-duplicate cluster goes through the model
+    representatives, copies = split_representatives(to_summarize, indexed_summary)
+    if len(representatives) < len(to_summarize):
+        print(f"♻️ {len(to_summarize) - len(representatives)} near-duplicates reuse another summary")
+
+    # Summarize all articles in batches
+    print(f"\n🔄 Summarizing {len(representatives)} articles in batches of {BATCH_SIZE}")
+    try:
+        contents = [article['content'] for article in representatives]
+        if workers > 1:
+            from parallel_summarize import summarize_parallel
+            summaries = summarize_parallel(contents, workers)
+        else:
+            from summarizer_router import summarize_contents
+            summaries = summarize_contents(contents, summarizer, tokenizer)
+        for article, summary in zip(representatives, summaries):
             article['summary'] = summary
-            print(f"✅ Summary: {summary}")
-            print("=" * 60)
+        copy_summaries(representatives, copies)
 
-        except Exception as e:
-            print(f"❌ Error processing article {i}: {e}")
+        # Display summaries
+        for article in to_summarize:
+            print(f"✅ {article['title']}")
+            print(f"   Summary: {article['summary']}")
             print("=" * 60)
-            continue
+
+    except Exception as e:
+        print(f"❌ Error summarizing articles: {e}")
+        print("=" * 60)
 
     if articles:
-        save_articles_to_json(articles)
+        save_articles_to_store(articles)
+    metrics.flush()
 
     return articles
 
@@ -0,0 +1,91 @@
+"""
+Multi-process summarization across CPU cores
+
+The model is loaded once in the parent process. Workers are forked from it, so
+they share the weights copy-on-write instead of each loading their own copy. On
+platforms without fork, each worker loads the model itself; the safetensors
+weights are memory-mapped, so the OS still shares their pages. Each worker is
+limited to a fixed number of torch intra-op threads so the workers do not
+oversubscribe the cores.
+"""
+import multiprocessing
+import os
+
+from news_summarize import get_local_model, run_summarization, summary_cache_key, MODEL_DIR, BATCH_SIZE
+from summary_cache import get_summary_cache
+
+_worker_model = None  # (summarizer, tokenizer) inherited by forked workers
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def init_worker(threads, model_dir):
+    # Runs once in every worker process
+    global _worker_model
+    import torch
+    torch.set_num_threads(threads)
+    if _worker_model is None:
+        _worker_model = get_local_model(model_dir)
+
+
+def summarize_shard(shard):
+    summarizer, tokenizer = _worker_model
+    indices, contents = zip(*shard)
+    summaries, succeeded = run_summarization(list(contents), summarizer, tokenizer, BATCH_SIZE)
+    return list(zip(indices, summaries, succeeded))
+
+
+def make_shards(contents, count):
+    # Spread (index, content) pairs over count shards with roughly equal total length
+    shards = [[] for _ in range(count)]
+    sizes = [0] * count
+    for i in sorted(range(len(contents)), key=lambda i: -len(contents[i])):
+        smallest = sizes.index(min(sizes))
+        shards[smallest].append((i, contents[i]))
+        sizes[smallest] += len(contents[i])
+    return [shard for shard in shards if shard]
+
+
+def summarize_parallel(contents, workers=None, threads_per_worker=None, model_dir=MODEL_DIR,
+                       use_cache=True):
+    """
+    Summarizes contents with `workers` processes and returns the summaries in input order
+    Cache lookups and writes happen in this process; only misses are sent to the workers
+    """
+    global _worker_model
+    workers = workers or default_workers()
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    summaries = [None] * len(contents)
+    keys = [None] * len(contents)
+    cache = get_summary_cache() if use_cache else None
+    if cache is not None:
+        keys = [summary_cache_key(content) for content in contents]
+        summaries = [cache.get(key) for key in keys]
+
+    misses = [i for i, summary in enumerate(summaries) if summary is None]
+    if not misses:
+        return summaries
+
+    shards = make_shards([contents[i] for i in misses], min(workers, len(misses)))
+
+    # Load once here so forked workers inherit the weights
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    if fork:
+        _worker_model = get_local_model(model_dir)
+    context = multiprocessing.get_context("fork" if fork else "spawn")
+
+    print(f"🔄 Summarizing {len(misses)} articles with {len(shards)} processes "
+          f"x {threads_per_worker} threads")
+    with context.Pool(len(shards), initializer=init_worker,
+                      initargs=(threads_per_worker, model_dir)) as pool:
+        for results in pool.imap_unordered(summarize_shard, shards):
+            for position, summary, ok in results:
+                i = misses[position]
+                summaries[i] = summary
+                if ok and cache is not None:
+                    cache.put(keys[i], summary)
+
+    return summaries
@@ -0,0 +1,326 @@
+"""
+Common interface over the summarization backends, and a router that spreads articles across them
+
+Backends (the local model, OpenRouter) all offer summarize_many(texts),
+stream(text) for a single summary written out as it is generated, and
+an estimate of how long a text will take and what it will cost. For every
+batch the router plans, longest article first, which backend finishes each one
+soonest, counting the work already queued on each backend (by this batch and
+by any other running in the process) plus its price in SECONDS_PER_DOLLAR. With
+the default settings short articles stay on the local model and long ones, or
+whatever the local model has no time left for, go to OpenRouter.
+
+Latency estimates are corrected by what each backend actually takes. A backend
+whose texts fail FAILURE_THRESHOLD times in a row is skipped for COOLDOWN
+seconds, and every text a backend failed is retried on the others.
+"""
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_integration")
+
+ROUTING_ENV = "SUMMARIZER_ROUTING"  # "local" (default) or "auto"
+TOKENS_PER_WORD = 1.3           # Rough tokens per whitespace-separated word
+LOCAL_OVERHEAD = 0.3            # Seconds per text on the local model, before its tokens
+LOCAL_SECONDS_PER_TOKEN = 0.004 # Local model seconds per input token it actually reads
+REMOTE_SECONDS = 4.0            # Seconds per OpenRouter request; the input is cut to a fixed size
+REMOTE_INPUT_TOKENS = 500       # Tokens of an article OpenRouter sees (the client sends 2000 characters)
+REMOTE_OUTPUT_TOKENS = 200
+REMOTE_COST_PER_1K = float(os.getenv("OPENROUTER_COST_PER_1K_TOKENS", "0"))  # Dollars; the free tier is 0
+SECONDS_PER_DOLLAR = 3600.0     # Waiting an hour is worth as much as a dollar of API spend
+LATENCY_SMOOTHING = 0.3         # Weight of the latest batch in a backend's speed estimate
+FAILURE_THRESHOLD = 3           # Consecutive failed texts before a backend is skipped
+COOLDOWN = 60.0                 # Seconds a failing backend is skipped for
+
+FAILED_SUMMARY = "Error: every summarizer backend failed"
+
+
+def estimate_tokens(text):
+    return int(len(text.split()) * TOKENS_PER_WORD)
+
+
+class SummarizerBackend(ABC):
+    """
+    Base class of the backends the router can use
+    Subclasses implement summarize_many(texts), returning one summary per text
+    (None where it failed), and prior_seconds(tokens), or cannot be instantiated;
+    the rest is bookkeeping shared by all of them: speed correction, queued work
+    and failure state
+    """
+
+    name = None
+    concurrency = 1             # Texts the backend works on at the same time
+    min_interval = 0.0          # Seconds between the starts of two texts, e.g. from a rate limit
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.speed = 1.0            # Observed / estimated seconds
+        self.pending = 0.0          # Estimated seconds of work queued on the backend
+        self.failures = 0           # Consecutive failed texts
+        self.open_until = 0.0       # Skipped until then after too many failures
+
+    @abstractmethod
+    def summarize_many(self, texts):
+        pass
+
+    def stream(self, text):
+        # Pieces of one text's summary as they are generated; backends that cannot
+        # stream yield the whole summary at once. Raises when the text failed
+        summary = self.summarize_many([text])[0]
+        if summary is None:
+            raise RuntimeError(f"{self.name} could not summarize the article")
+        yield summary
+
+    @abstractmethod
+    def prior_seconds(self, tokens):
+        pass
+
+    def cost(self, tokens):
+        # Dollars to summarize a text of this many tokens
+        return 0.0
+
+    def is_cached(self, text):
+        return False
+
+    def usable(self):
+        return time.time() >= self.open_until
+
+    def prior_slot(self, tokens):
+        # How much a text adds to the backend's queue, given it runs `concurrency` texts at once
+        return max(self.prior_seconds(tokens) / self.concurrency, self.min_interval)
+
+    def slot_seconds(self, tokens):
+        return self.prior_slot(tokens) * self.speed
+
+    def record(self, token_counts, seconds, failed):
+        # Correct the speed estimate with a finished call and update the failure state
+        with self._lock:
+            expected = sum(self.prior_slot(tokens) for tokens in token_counts)
+            if expected > 0 and failed < len(token_counts):
+                ratio = seconds / expected
+                self.speed = LATENCY_SMOOTHING * ratio + (1 - LATENCY_SMOOTHING) * self.speed
+            self.failures = self.failures + failed if failed else 0
+            if self.failures >= FAILURE_THRESHOLD:
+                print(f"⚠️ {self.name} failed {self.failures} times in a row, skipping it for {COOLDOWN:.0f}s")
+                self.open_until = time.time() + COOLDOWN
+                self.failures = 0
+
+    def queue(self, seconds):
+        with self._lock:
+            self.pending = max(0.0, self.pending + seconds)
+
+
+class LocalBackend(SummarizerBackend):
+    """The local Falconsai model, through the summary cache and the batched pipeline"""
+
+    name = "local"
+
+    def __init__(self, summarizer=None, tokenizer=None):
+        super().__init__()
+        self.summarizer = summarizer
+        self.tokenizer = tokenizer
+
+    def prior_seconds(self, tokens):
+        from news_summarize import EXTRACTIVE_TOKENS
+
+        # Long articles are cut down to their salient sentences before the model sees them
+        read = min(tokens, EXTRACTIVE_TOKENS) if EXTRACTIVE_TOKENS else tokens
+        return LOCAL_OVERHEAD + LOCAL_SECONDS_PER_TOKEN * read
+
+    def is_cached(self, text):
+        from news_summarize import summary_cache_key
+        from summary_cache import get_summary_cache
+
+        return get_summary_cache().get(summary_cache_key(text)) is not None
+
+    def summarize_many(self, texts):
+        from news_summarize import summarize_articles_checked
+
+        # Texts the model failed on come back as None, so the router retries them elsewhere
+        summaries, succeeded = summarize_articles_checked(texts, self.summarizer, self.tokenizer)
+        return [summary if ok else None for summary, ok in zip(summaries, succeeded)]
+
+    def stream(self, text):
+        from news_summarize import stream_summary
+
+        return stream_summary(text, self.summarizer, self.tokenizer)
+
+
+class OpenRouterBackend(SummarizerBackend):
+    """Llama 3.3 on OpenRouter, through the rate-limited async client"""
+
+    name = "openrouter"
+
+    def __init__(self, max_tokens=REMOTE_OUTPUT_TOKENS, **client_options):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.client_options = client_options
+        self._api = self.api()
+        if self._api is not None:
+            from openrouter_client import MAX_IN_FLIGHT, REQUESTS_PER_MINUTE
+
+            self.concurrency = client_options.get('max_in_flight', MAX_IN_FLIGHT)
+            self.min_interval = 60.0 / client_options.get('requests_per_minute', REQUESTS_PER_MINUTE)
+
+    @staticmethod
+    def api():
+        # The API integration module, or None if its dependencies are missing
+        if API_DIR not in sys.path:
+            sys.path.append(API_DIR)
+        try:
+            import news_summarizer_api
+        except ImportError as e:
+            print(f"OpenRouter backend unavailable: {e}")
+            return None
+        return news_summarizer_api
+
+    def usable(self):
+        return super().usable() and self._api is not None and bool(os.getenv("OPENROUTER_API_KEY"))
+
+    def prior_seconds(self, tokens):
+        return REMOTE_SECONDS
+
+    def cost(self, tokens):
+        return (min(tokens, REMOTE_INPUT_TOKENS) + self.max_tokens) / 1000 * REMOTE_COST_PER_1K
+
+    def is_cached(self, text):
+        from summary_cache import get_summary_cache, cache_key
+        from openrouter_client import OPENROUTER_MODEL, TEMPERATURE, TOP_P
+
+        key = cache_key(text, OPENROUTER_MODEL, max_tokens=self.max_tokens, temperature=TEMPERATURE, top_p=TOP_P)
+        return get_summary_cache().get(key) is not None
+
+    def summarize_many(self, texts):
+        summaries = self._api.llama33_summarize_many(texts, self.max_tokens, **self.client_options)
+        return [None if summary == self._api.FAILED_SUMMARY else summary for summary in summaries]
+
+    def stream(self, text):
+        return self._api.llama33_summarize_stream(text, self.max_tokens, **self.client_options)
+
+
+class SummarizerRouter:
+    """Sends every text to the backend expected to finish it soonest, per unit of cost"""
+
+    def __init__(self, backends, seconds_per_dollar=SECONDS_PER_DOLLAR):
+        self.backends = list(backends)
+        self.seconds_per_dollar = seconds_per_dollar
+
+    def plan(self, texts, backends, exclude=None):
+        """
+        Backend for each text (None where none is left) and the texts' token estimates
+        Longest texts are placed first, each on the backend with the lowest queued work
+        plus its own time plus its price; cached texts go where they are cached.
+        exclude[i] holds backends text i must not be sent to
+        """
+        tokens = [estimate_tokens(text) for text in texts]
+        queued = {backend: backend.pending for backend in backends}
+        choice = [None] * len(texts)
+
+        for i in sorted(range(len(texts)), key=lambda i: -tokens[i]):
+            candidates = [backend for backend in backends if not exclude or backend not in exclude[i]]
+            cached = [backend for backend in candidates if backend.is_cached(texts[i])]
+            if cached:
+                choice[i] = cached[0]
+                continue
+            best = None
+            for backend in candidates:
+                finish = queued[backend] + backend.slot_seconds(tokens[i])
+                score = finish + backend.cost(tokens[i]) * self.seconds_per_dollar
+                if best is None or score < best[0]:
+                    best = (score, backend, finish)
+            if best is not None:
+                choice[i] = best[1]
+                queued[best[1]] = best[2]
+        return choice, tokens
+
+    def run(self, backend, texts, tokens):
+        # Summarize texts on one backend, keeping its queue and speed estimate up to date
+        queued = sum(backend.slot_seconds(t) for t in tokens)
+        backend.queue(queued)
+        start = time.perf_counter()
+        try:
+            summaries = list(backend.summarize_many(texts))
+        except Exception as e:
+            print(f"❌ {backend.name} failed: {e}")
+            summaries = [None] * len(texts)
+        finally:
+            backend.queue(-queued)
+        backend.record(tokens, time.perf_counter() - start, sum(s is None for s in summaries))
+        return summaries
+
+    def summarize_many(self, texts):
+        """Summaries of all texts, in input order; texts no backend managed get FAILED_SUMMARY"""
+        texts = list(texts)
+        summaries = [None] * len(texts)
+        tried = [set() for _ in texts]
+        todo = list(range(len(texts)))
+
+        while todo:
+            # Texts that failed are planned again over the backends they have not failed on
+            backends = [backend for backend in self.backends if backend.usable()]
+            choice, tokens = self.plan([texts[i] for i in todo], backends, [tried[i] for i in todo])
+            groups = {}
+            for i, backend, n in zip(todo, choice, tokens):
+                if backend is not None:
+                    groups.setdefault(backend, []).append((i, n))
+            if not groups:
+                break
+
+            for backend, jobs in groups.items():
+                print(f"🔀 {len(jobs)} articles to {backend.name}")
+                metrics.count("routed_articles_total", len(jobs), backend=backend.name)
+            with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+                futures = {backend: pool.submit(self.run, backend, [texts[i] for i, _ in jobs],
+                                                [n for _, n in jobs])
+                           for backend, jobs in groups.items()}
+
+            failed = []
+            for backend, jobs in groups.items():
+                for (i, _), summary in zip(jobs, futures[backend].result()):
+                    tried[i].add(backend)
+                    if summary is None:
+                        failed.append(i)
+                    else:
+                        summaries[i] = summary
+            if failed:
+                print(f"↩️ Retrying {len(failed)} failed articles on another backend")
+                metrics.count("route_fallbacks_total", len(failed))
+            todo = failed
+
+        return [FAILED_SUMMARY if summary is None else summary for summary in summaries]
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    # Process-wide router over the local model and OpenRouter, so queue and speed
+    # estimates are shared by everything summarizing in this process
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = SummarizerRouter([LocalBackend(), OpenRouterBackend()])
+        return _router
+
+
+def routing_enabled():
+    return os.getenv(ROUTING_ENV, "local") == "auto"
+
+
+def summarize_contents(contents, summarizer=None, tokenizer=None):
+    """
+    Summaries of article contents, in order: spread over the backends by the router
+    when SUMMARIZER_ROUTING=auto, otherwise all on the local model
+    """
+    if routing_enabled():
+        return get_router().summarize_many(contents)
+    from news_summarize import summarize_articles_batched
+
+    return summarize_articles_batched(contents, summarizer, tokenizer)
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+SUMMARY_CACHE_FILE = "summary_cache.db"
+MAX_ENTRIES = 5000
+
+
+def normalize_content(text):
+    # Canonical form of an article body, so re-posts that differ only in whitespace share a key
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def cache_key(content, model_id, **params):
+    # Hash of the normalized content plus everything that influences the generated summary
+    payload = json.dumps({
+        'content': normalize_content(content),
+        'model': model_id,
+        'params': params,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Content-addressed summary cache
+    Entries live in memory in least-recently-used order for lookups without I/O,
+    and in a SQLite file so they survive restarts. The file is shared by the UI,
+    worker and poller processes: a memory miss falls back to it, so a summary any
+    of them wrote is found by the others. Once more than `max_entries` summaries
+    are stored the least recently used ones in the file are evicted
+    """
+
+    def __init__(self, filename=SUMMARY_CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.filename = filename
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> summary, least recently used first
+        self._touched = set()           # keys read since the last flush
+
+        self._db = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, summary TEXT NOT NULL, last_used REAL NOT NULL)")
+        rows = self._db.execute(
+            "SELECT key, summary FROM summaries ORDER BY last_used").fetchall()
+        self._entries.update(rows)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def get(self, key):
+        # Return the cached summary for key, or None
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is None:
+                # Possibly written by another process since this one loaded the file
+                row = self._db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                summary = row[0]
+                self._remember(key, summary)
+            self._entries.move_to_end(key)
+            self._touched.add(key)
+            return summary
+
+    def put(self, key, summary):
+        with self._lock:
+            self._remember(key, summary)
+            self._touched.discard(key)
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, last_used) VALUES (?, ?, ?)",
+                (key, summary, time.time()))
+
+            # Evict by the recency recorded in the file, which covers every process's reads
+            self._flush_touched()
+            self._db.execute(
+                "DELETE FROM summaries WHERE key IN ("
+                "SELECT key FROM summaries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+            self._db.commit()
+
+    def flush(self):
+        # Persist the recency of entries read since the last write
+        with self._lock:
+            self._flush_touched()
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM summaries")
+            self._db.commit()
+
+    def _remember(self, key, summary):
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _flush_touched(self):
+        if self._touched:
+            now = time.time()
+            self._db.executemany("UPDATE summaries SET last_used = ? WHERE key = ?",
+                                 [(now, k) for k in self._touched])
+            self._touched.clear()
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_summary_cache():
+    # The cache of this process; every summarizer path reads and writes the same entries
+    # through one SQLite connection
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = SummaryCache()
+        return _shared_cache
@@ -0,0 +1,257 @@
+"""
+Background summarization worker and its job queue
+
+The web UI submits jobs with submit_job() and polls them with get_job(); a
+separate, long-running worker process (python summary_worker.py) owns the
+model and works through the queue. Jobs live in a SQLite file so they survive
+UI reruns, page navigation and restarts of either side.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import metrics
+from article_record import Article
+
+JOBS_FILE = "summary_jobs.db"
+POLL_INTERVAL = 1.0         # Seconds between queue checks when idle
+HEARTBEAT_TIMEOUT = 15.0    # A worker silent for longer is considered gone
+JOB_RETENTION = 24 * 3600   # Seconds finished jobs, with their results, are kept for
+
+_local = threading.local()
+
+
+def connect(filename=JOBS_FILE):
+    # One connection per thread; WAL lets the UI read while the worker writes
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    if filename not in connections:
+        db = sqlite3.connect(filename, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                articles TEXT NOT NULL,
+                results TEXT NOT NULL DEFAULT '[]',
+                total INTEGER NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+            CREATE TABLE IF NOT EXISTS workers (
+                pid INTEGER PRIMARY KEY,
+                heartbeat REAL NOT NULL
+            );
+        """)
+        connections[filename] = db
+    return connections[filename]
+
+
+def job_id_for(articles):
+    # Identical article sets give identical job ids, which is what deduplicates jobs
+    digest = hashlib.sha256()
+    for article in articles:
+        digest.update((article.url or '').encode("utf-8") + b"\0")
+        digest.update((article.content_ref or '').encode("utf-8") + b"\0")
+    return digest.hexdigest()[:32]
+
+
+def submit_job(articles, filename=JOBS_FILE):
+    """
+    Queues the articles for summarization and returns the job id
+    If an identical job is already queued or running, its id is returned instead
+    of queueing the work again; a finished one is queued again, so articles that
+    failed are retried (the ones that succeeded come from the summary cache)
+    Jobs carry references into the content store, not the article texts
+    """
+    articles = Article.from_dicts(articles)
+    job_id = job_id_for(articles)
+    fields = ('title', 'url', 'source', 'published', 'content_ref', 'content_length', 'duplicate_of')
+    payload = [{k: article[k] for k in fields if k in article} for article in articles]
+    now = time.time()
+
+    db = connect(filename)
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        prune_jobs(db, now)
+        row = db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            db.execute("INSERT INTO jobs (id, status, articles, total, created_at, updated_at) "
+                       "VALUES (?, 'queued', ?, ?, ?, ?)",
+                       (job_id, json.dumps(payload, ensure_ascii=False), len(payload), now, now))
+        elif row['status'] in ('done', 'failed'):
+            db.execute("UPDATE jobs SET status = 'queued', done = 0, results = '[]', error = NULL, "
+                       "created_at = ?, updated_at = ? WHERE id = ?", (now, now, job_id))
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    return job_id
+
+
+def prune_jobs(db, now):
+    # Drop finished jobs, and their results, once nobody is likely to poll them any more
+    db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+               (now - JOB_RETENTION,))
+
+
+def get_job(job_id, filename=JOBS_FILE):
+    """Status, progress and (partial) results of a job, or None if it is unknown"""
+    row = connect(filename).execute(
+        "SELECT id, status, results, total, done, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job['results'] = json.loads(job['results'])
+    job['progress'] = job['done'] / job['total'] if job['total'] else 1.0
+    return job
+
+
+def worker_alive(filename=JOBS_FILE):
+    cutoff = time.time() - HEARTBEAT_TIMEOUT
+    row = connect(filename).execute(
+        "SELECT COUNT(*) FROM workers WHERE heartbeat > ?", (cutoff,)).fetchone()
+    return row[0] > 0
+
+
+def ensure_worker(filename=JOBS_FILE):
+    # Start a detached worker process unless one is already running
+    if worker_alive(filename):
+        return False
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), filename],
+                     start_new_session=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return True
+
+
+def register_worker(db, pid):
+    # Record this process as the worker; False if another live worker already holds the queue
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        others = db.execute("SELECT COUNT(*) FROM workers WHERE pid != ? AND heartbeat > ?",
+                            (pid, time.time() - HEARTBEAT_TIMEOUT)).fetchone()[0]
+        if not others:
+            # Jobs left running by a worker that died are picked up again
+            db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+            db.execute("DELETE FROM workers")
+            db.execute("INSERT INTO workers (pid, heartbeat) VALUES (?, ?)", (pid, time.time()))
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    return not others
+
+
+def heartbeat(filename, pid, stop):
+    # Keep the worker's heartbeat fresh, also while a long job is running
+    db = connect(filename)
+    while not stop.wait(HEARTBEAT_TIMEOUT / 3):
+        db.execute("UPDATE workers SET heartbeat = ? WHERE pid = ?", (time.time(), pid))
+
+
+def claim_job(db):
+    # Atomically move the oldest queued job to running and return it
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        row = db.execute("SELECT id, articles FROM jobs WHERE status = 'queued' "
+                         "ORDER BY created_at LIMIT 1").fetchone()
+        if row is not None:
+            db.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+                       (time.time(), row['id']))
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    return row
+
+
+def process_job(db, job_id, articles, summarizer, tokenizer):
+    # Summarize a job's articles in batches, recording progress and partial results as it goes,
+    # then save them to the summaries store and the article index, whoever submitted the job
+    from news_summarize import indexed_summary, save_articles_to_store, too_short, BATCH_SIZE
+    from summarizer_router import summarize_contents
+    from near_duplicates import split_representatives, copy_summaries
+
+    articles = Article.from_dicts(articles)
+
+    def results():
+        return json.dumps([article.to_record() for article in articles], ensure_ascii=False)
+
+    for article in articles:
+        if too_short(article):
+            article['summary'] = "Content too short"
+    eligible = [a for a in articles if 'summary' not in a]
+    to_summarize, copies = split_representatives(eligible, indexed_summary)
+
+    done = len(articles) - len(to_summarize)
+    for start in range(0, len(to_summarize), BATCH_SIZE):
+        batch = to_summarize[start:start + BATCH_SIZE]
+        try:
+            summaries = summarize_contents(
+                [article['content'] for article in batch], summarizer, tokenizer)
+            for article, summary in zip(batch, summaries):
+                article['summary'] = summary
+        except Exception as e:
+            for article in batch:
+                article['summary'] = f"Error: {str(e)}"
+        copy_summaries(batch, copies)
+
+        done += len(batch)
+        db.execute("UPDATE jobs SET done = ?, results = ?, updated_at = ? WHERE id = ?",
+                   (done, results(), time.time(), job_id))
+
+    save_articles_to_store(articles)
+    db.execute("UPDATE jobs SET status = 'done', done = total, results = ?, updated_at = ? "
+               "WHERE id = ?", (results(), time.time(), job_id))
+
+
+def run_worker(filename=JOBS_FILE, poll_interval=POLL_INTERVAL):
+    """Owns the model and processes queued jobs until interrupted"""
+    from news_summarize import get_local_model
+
+    db = connect(filename)
+    pid = os.getpid()
+
+    if not register_worker(db, pid):
+        print("Another worker is already running")
+        return
+
+    stop = threading.Event()
+    threading.Thread(target=heartbeat, args=(filename, pid, stop), daemon=True).start()
+
+    try:
+        print("Loading model...")
+        summarizer, tokenizer = get_local_model()
+        print(f"🛠️ Worker {pid} ready, waiting for jobs")
+
+        while True:
+            row = claim_job(db)
+            if row is None:
+                time.sleep(poll_interval)
+                continue
+
+            print(f"🔄 Job {row['id']}")
+            try:
+                process_job(db, row['id'], json.loads(row['articles']), summarizer, tokenizer)
+                print(f"✅ Job {row['id']} done")
+                metrics.flush()
+            except Exception as e:
+                print(f"❌ Job {row['id']} failed: {e}")
+                db.execute("UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                           (str(e), time.time(), row['id']))
+    finally:
+        stop.set()
+        db.execute("DELETE FROM workers WHERE pid = ?", (pid,))
+
+
+if __name__ == "__main__":
+    run_worker(sys.argv[1] if len(sys.argv) > 1 else JOBS_FILE)
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def scratch_dir(tmp_path, monkeypatch):
+    # Every test gets its own working directory and fresh process-wide stores
+    import article_index
+    import article_store
+    import content_store
+    import summary_cache
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(summary_cache, "_shared_cache", None)
+    monkeypatch.setattr(content_store, "_shared_store", None)
+    monkeypatch.setattr(article_index, "_shared_index", None)
+    monkeypatch.setattr(article_store, "_stores", {})
+    return tmp_path
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import article_index
+from article_index import ArticleIndex, get_article_index, is_summary
+from article_record import Article
+from article_store import JsonlStore, ARTICLES_STORE, SUMMARIES_STORE
+
+CONTENT = "The telescope imaged a distant galaxy cluster in unprecedented detail. " * 5
+
+
+def article(n, summary=""):
+    return {'title': f"Article {n}", 'url': f"https://example.com/{n}", 'content': f"{n} {CONTENT}",
+            'summary': summary}
+
+
+@pytest.mark.parametrize("summary", ["", "Content too short", "Error: model crashed",
+                                     "Summary generation failed.", "Summarization failed after multiple attempts"])
+def test_failure_placeholders_are_not_summaries(summary):
+    assert not is_summary(summary)
+
+
+def test_failures_are_not_indexed_as_summaries(tmp_path):
+    index = ArticleIndex(str(tmp_path / "index.db"))
+    index.add_many([article(1, "A real summary."), article(2, "Error: every summarizer backend failed")])
+
+    assert index.get("https://example.com/2")['summary'] == ""
+    assert index.summarized(["https://example.com/1", "https://example.com/2"]) == {"https://example.com/1"}
+
+    # A later real summary is recorded; a later failure keeps the real one
+    index.add(article(2, "Now summarized."))
+    index.add(article(1, "Content too short"))
+    assert index.get("https://example.com/2")['summary'] == "Now summarized."
+    assert index.get("https://example.com/1")['summary'] == "A real summary."
+
+
+def test_legacy_failure_rows_do_not_count(tmp_path, monkeypatch):
+    index = ArticleIndex(str(tmp_path / "index.db"))
+    index.add(article(1))
+    index._db.execute("UPDATE articles SET summary = 'Summary generation failed.'")
+    monkeypatch.setattr(article_index, "_shared_index", index)
+
+    from news_summarize import indexed_summary
+
+    assert index.summarized(["https://example.com/1"]) == set()
+    assert index.count(has_summary=True) == 0 and index.count(has_summary=False) == 1
+    assert indexed_summary("https://example.com/1") is None
+
+
+def test_existing_stores_are_backfilled_once(tmp_path):
+    # An install from before the index: scraped articles in the legacy JSON file,
+    # summaries already migrated to the JSONL store
+    with open(tmp_path / "astronomy_articles.json", "w", encoding="utf-8") as f:
+        json.dump([article(1), article(2)], f)
+    JsonlStore(SUMMARIES_STORE).extend([Article.from_dict(article(1, "A summary")).to_record()])
+
+    index = get_article_index()
+    assert index.count() == 2
+    assert index.get("https://example.com/1")['summary'] == "A summary"
+
+    JsonlStore(ARTICLES_STORE).append(Article.from_dict(article(3)).to_record())
+    assert ArticleIndex().backfill(JsonlStore(ARTICLES_STORE)) == 0
@@ -0,0 +1,61 @@
+import multiprocessing
+
+from article_store import JsonlStore
+
+
+def test_appends_from_separate_instances_trigger_compaction(tmp_path):
+    path = str(tmp_path / "store.jsonl")
+    for run in range(3):
+        # A fresh instance per run, like separate CLI invocations
+        store = JsonlStore(path, compact_every=500)
+        store.extend([{'url': "https://example.com/1", 'run': run, 'n': n} for n in range(400)])
+
+    assert len(JsonlStore(path)) < 500
+    assert JsonlStore(path).get(-1) == {'url': "https://example.com/1", 'run': 2, 'n': 399}
+
+
+def test_compaction_keeps_latest_record_per_key(tmp_path):
+    store = JsonlStore(str(tmp_path / "store.jsonl"), compact_every=0)
+    store.extend([{'url': "a", 'v': 1}, {'url': "b", 'v': 1}, {'url': "a", 'v': 2}])
+    store.compact()
+
+    assert list(store) == [{'url': "b", 'v': 1}, {'url': "a", 'v': 2}]
+    assert store.latest_unique(10) == [{'url': "b", 'v': 1}, {'url': "a", 'v': 2}]
+
+
+def append_records(path, worker, count):
+    store = JsonlStore(path, compact_every=0)
+    for n in range(count):
+        store.append({'url': f"https://example.com/{worker}/{n}"})
+
+
+def test_appends_from_several_processes_keep_the_index_in_step(tmp_path):
+    path = str(tmp_path / "store.jsonl")
+    JsonlStore(path)
+    processes = [multiprocessing.Process(target=append_records, args=(path, worker, 300)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    store = JsonlStore(path)
+    records = [store.get(i) for i in range(len(store))]
+    assert len(records) == 1200
+    assert len({r['url'] for r in records}) == 1200
+
+
+def test_repair_rebuilds_an_index_left_from_before_a_compaction(tmp_path):
+    path = str(tmp_path / "store.jsonl")
+    store = JsonlStore(path, compact_every=0)
+    store.extend([{'url': "a", 'text': "x" * 10}, {'url': "b", 'text': "y"}, {'url': "a", 'text': "z"}])
+    with open(path + ".idx", "rb") as f:
+        stale_index = f.read()
+    store.compact()
+
+    # A crash between the two renames pairs the new data file with the old index
+    with open(path + ".idx", "wb") as f:
+        f.write(stale_index)
+
+    store = JsonlStore(path)
+    assert len(store) == 2
+    assert [store.get(0), store.get(1)] == [{'url': "b", 'text': "y"}, {'url': "a", 'text': "z"}]
@@ -0,0 +1,40 @@
+import email.utils
+
+from feed_poller import FETCH_ATTEMPTS, PollerState
+
+NOW = 1_700_000_000.0
+
+
+def entry(n, age):
+    return {'link': f"https://example.com/{n}", 'published': email.utils.formatdate(NOW - age)}
+
+
+def test_failed_downloads_are_selected_again():
+    state = PollerState(None)
+    entries = [entry(1, 600), entry(2, 300)]
+
+    assert state.select_new("feed", entries, NOW) == entries
+    state.commit("feed", [entries[0]], [entries[1]], NOW)
+    assert state.select_new("feed", entries, NOW + 60) == [entries[1]]
+
+    state.commit("feed", [entries[1]], [], NOW + 60)
+    assert state.select_new("feed", entries, NOW + 120) == []
+
+
+def test_watermark_waits_for_older_failed_entry():
+    state = PollerState(None)
+    old, new = entry(1, 3 * 3600), entry(2, 60)
+    state.select_new("feed", [old, new], NOW)
+    state.commit("feed", [new], [old], NOW)
+
+    assert state.select_new("feed", [old, new], NOW + 60) == [old]
+
+
+def test_entry_is_given_up_after_repeated_failures():
+    state = PollerState(None)
+    entries = [entry(1, 600)]
+    for attempt in range(FETCH_ATTEMPTS):
+        assert state.select_new("feed", entries, NOW + attempt) == entries
+        state.commit("feed", [], entries, NOW + attempt)
+
+    assert state.select_new("feed", entries, NOW + FETCH_ATTEMPTS) == []
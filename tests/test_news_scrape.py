@@ -0,0 +1,33 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import feedparser
+
+import news_scrape
+from news_scrape import HostLimiter, fetch_article, get_extract_pool
+
+ARTICLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "benchmarks", "data", "articles")
+
+
+class BrokenPool:
+    def submit(self, fn, *args):
+        raise BrokenProcessPool("a worker died")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_broken_pool_is_parsed_around_and_replaced(monkeypatch):
+    name = sorted(os.listdir(ARTICLES_DIR))[0]
+    with open(os.path.join(ARTICLES_DIR, name), "r", encoding="utf-8") as f:
+        html = f.read()
+    monkeypatch.setattr(news_scrape, "download_html", lambda url: html)
+    broken = BrokenPool()
+    monkeypatch.setattr(news_scrape, "_extract_pool", broken)
+    entry = feedparser.FeedParserDict(link="https://example.com/a", title="An article")
+
+    article = fetch_article(entry, "Example", HostLimiter(2), extract_pool=get_extract_pool(1))
+
+    assert article is not None and article['content']
+    assert news_scrape._extract_pool is None
@@ -0,0 +1,39 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "api_integration"))
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+from mock_openrouter import MockOpenRouter
+from openrouter_client import OpenRouterError, iter_sse_events, stream_summary
+
+ARTICLE = " ".join(f"word{i}" for i in range(60))
+
+
+def test_sse_events_skip_comments_and_join_data_lines():
+    async def events(lines):
+        async def stream():
+            for line in lines:
+                yield line
+        return [data async for data in iter_sse_events(stream())]
+
+    lines = [b": OPENROUTER PROCESSING\n", b"\n", b"data: a\r\n", b"data:b\n", b"\n", b"event: x\n", b"data: c\n"]
+    assert asyncio.run(events(lines)) == ["a\nb", "c"]
+
+
+def test_stream_yields_summary_piece_by_piece():
+    with MockOpenRouter(latency=0.01) as server:
+        pieces = list(stream_summary(ARTICLE, "key", base_url=server.url, requests_per_minute=6000))
+    assert len(pieces) == 40
+    assert "".join(pieces) == " ".join(ARTICLE.split()[-40:])
+
+
+def test_stream_raises_when_every_attempt_fails():
+    with MockOpenRouter(latency=0.01, throttle_every=1) as server:
+        with pytest.raises(OpenRouterError):
+            list(stream_summary(ARTICLE, "key", base_url=server.url, requests_per_minute=6000, retries=2))
+        assert server.requests == 2
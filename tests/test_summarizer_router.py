@@ -0,0 +1,91 @@
+import pytest
+
+import summarizer_router
+from summarizer_router import FAILED_SUMMARY, LocalBackend, SummarizerBackend, SummarizerRouter
+
+ARTICLE = " ".join(f"word{i}" for i in range(120))
+
+
+class WordTokenizer:
+    def tokenize(self, text):
+        return text.split()
+
+    def convert_tokens_to_string(self, tokens):
+        return " ".join(tokens)
+
+
+class LeadSummarizer:
+    """Pipeline stand-in: the first words of every input"""
+
+    def __call__(self, texts, **params):
+        batch = [texts] if isinstance(texts, str) else texts
+        return [{'summary_text': " ".join(text.split()[:10])} for text in batch]
+
+
+class BrokenSummarizer:
+    def __call__(self, texts, **params):
+        raise RuntimeError("model crashed")
+
+
+class FakeRemote(SummarizerBackend):
+    """Remote backend that is quicker than the local one on paper"""
+
+    name = "remote"
+
+    def __init__(self, working):
+        super().__init__()
+        self.working = working
+        self.texts = []
+
+    def prior_seconds(self, tokens):
+        return 0.001
+
+    def summarize_many(self, texts):
+        self.texts.extend(texts)
+        return [f"remote summary of {text[:10]}" if self.working else None for text in texts]
+
+
+def texts(n):
+    return [f"article{i} {ARTICLE}" for i in range(n)]
+
+
+def test_local_failures_fall_back_to_remote():
+    local = LocalBackend(BrokenSummarizer(), WordTokenizer())
+    remote = FakeRemote(working=True)
+    remote.prior_seconds = lambda tokens: 1e6   # Planned onto the local model first
+    router = SummarizerRouter([local, remote])
+
+    summaries = router.summarize_many(texts(2))
+    assert len(remote.texts) == 2
+    assert all(summary.startswith("remote summary") for summary in summaries)
+    assert local.failures == 2
+
+
+def test_remote_failures_fall_back_to_local():
+    local = LocalBackend(LeadSummarizer(), WordTokenizer())
+    remote = FakeRemote(working=False)
+    router = SummarizerRouter([local, remote])
+
+    summaries = router.summarize_many(texts(3))
+    assert len(remote.texts) == 3
+    assert summaries == [" ".join(text.split()[:10]) for text in texts(3)]
+
+
+def test_all_backends_failing_gives_failed_summary():
+    router = SummarizerRouter([LocalBackend(BrokenSummarizer(), WordTokenizer()), FakeRemote(working=False)])
+    assert router.summarize_many(texts(2)) == [FAILED_SUMMARY] * 2
+
+
+def test_breaker_trips_on_local_failures():
+    local = LocalBackend(BrokenSummarizer(), WordTokenizer())
+    SummarizerRouter([local]).summarize_many(texts(summarizer_router.FAILURE_THRESHOLD))
+    assert not local.usable()
+
+
+def test_incomplete_backend_cannot_be_created():
+    class NoEstimate(SummarizerBackend):
+        def summarize_many(self, texts):
+            return list(texts)
+
+    with pytest.raises(TypeError):
+        NoEstimate()
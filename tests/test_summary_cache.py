@@ -0,0 +1,24 @@
+from summary_cache import SummaryCache
+
+
+def test_summary_written_by_another_process_is_found(tmp_path):
+    filename = str(tmp_path / "cache.db")
+    ui, worker = SummaryCache(filename), SummaryCache(filename)
+
+    worker.put("key", "A summary")
+
+    assert ui.get("key") == "A summary"
+    assert ui.get("missing") is None
+
+
+def test_eviction_covers_entries_written_by_every_process(tmp_path):
+    filename = str(tmp_path / "cache.db")
+    ui, worker = SummaryCache(filename, max_entries=2), SummaryCache(filename, max_entries=2)
+
+    ui.put("a", "1")
+    worker.put("b", "2")
+    ui.put("c", "3")
+
+    assert len(worker) == 2
+    assert SummaryCache(filename).get("a") is None
+    assert worker.get("b") == "2" and worker.get("c") == "3"
@@ -0,0 +1,70 @@
+import json
+import time
+
+import summarizer_router
+from article_index import get_article_index
+from article_store import get_store, SUMMARIES_STORE
+from summary_worker import JOB_RETENTION, claim_job, connect, get_job, process_job, submit_job
+
+ARTICLES = [{'title': "Article", 'url': "https://example.com/1", 'content': "Some article text. " * 10}]
+
+
+def finish(job_id, filename, status='done', age=0.0):
+    connect(filename).execute("UPDATE jobs SET status = ?, done = total, updated_at = ? WHERE id = ?",
+                              (status, time.time() - age, job_id))
+
+
+def test_running_jobs_are_shared(tmp_path):
+    filename = str(tmp_path / "jobs.db")
+    job_id = submit_job(ARTICLES, filename)
+    assert submit_job(ARTICLES, filename) == job_id
+    assert get_job(job_id, filename)['status'] == 'queued'
+
+
+def test_finished_jobs_are_queued_again(tmp_path):
+    filename = str(tmp_path / "jobs.db")
+    job_id = submit_job(ARTICLES, filename)
+    finish(job_id, filename)
+
+    assert submit_job(ARTICLES, filename) == job_id
+    job = get_job(job_id, filename)
+    assert job['status'] == 'queued' and job['done'] == 0 and job['results'] == []
+
+
+def test_old_finished_jobs_are_pruned(tmp_path):
+    filename = str(tmp_path / "jobs.db")
+    old = submit_job(ARTICLES, filename)
+    finish(old, filename, age=JOB_RETENTION + 60)
+
+    submit_job([dict(ARTICLES[0], url="https://example.com/2")], filename)
+    assert get_job(old, filename) is None
+
+
+def test_processed_jobs_are_saved_whoever_submitted_them(tmp_path, monkeypatch):
+    monkeypatch.setattr(summarizer_router, "summarize_contents",
+                        lambda contents, summarizer, tokenizer: ["A summary"] * len(contents))
+    filename = str(tmp_path / "jobs.db")
+    job_id = submit_job(ARTICLES, filename)
+    row = claim_job(connect(filename))
+
+    process_job(connect(filename), job_id, json.loads(row['articles']), None, None)
+
+    assert get_job(job_id, filename)['status'] == 'done'
+    assert get_store(SUMMARIES_STORE).get(-1)['summary'] == "A summary"
+    assert get_article_index().get("https://example.com/1")['summary'] == "A summary"
+
+
+def test_worker_skips_the_same_articles_as_in_process_summarizing(tmp_path, monkeypatch):
+    from news_summarize import MIN_CONTENT_LENGTH
+
+    monkeypatch.setattr(summarizer_router, "summarize_contents",
+                        lambda contents, summarizer, tokenizer: ["A summary"] * len(contents))
+    filename = str(tmp_path / "jobs.db")
+    articles = [dict(ARTICLES[0], url=f"https://example.com/{n}", content="x" * n)
+                for n in (MIN_CONTENT_LENGTH - 1, MIN_CONTENT_LENGTH)]
+    job_id = submit_job(articles, filename)
+    row = claim_job(connect(filename))
+
+    process_job(connect(filename), job_id, json.loads(row['articles']), None, None)
+
+    assert [r['summary'] for r in get_job(job_id, filename)['results']] == ["Content too short", "A summary"]
@@ -1,48 +1,176 @@
-import streamlit as st
-import json
 import os
+import time
+import streamlit as st
 from datetime import datetime
 
-from news_scrape import get_astronomy_articles
-from news_summarize import summarize_single_article, setup_local_model, load_local_summarizer
-from transformers import AutoTokenizer
-
+from news_scrape import get_astronomy_articles, iter_astronomy_articles
+from news_summarize import summarize_stream, get_local_model, unload_local_model, indexed_summary, too_short
+from article_store import get_store, ARTICLES_STORE, SUMMARIES_STORE
+from article_index import get_article_index, canonical_url, published_timestamp, is_summary, PAGE_SIZE
+from article_record import Article
+from near_duplicates import get_near_duplicate_index
+from summary_worker import submit_job, get_job, ensure_worker, worker_alive
+from summarizer_router import get_router
+import metrics
+
+# Whole-file JSON used before the stores; imported into them on first use
 ARTICLES_FILE = "astronomy_articles.json"
 SUMMARY_FILE = "astronomy_summaries_falconsai.json"
 
+LOAD_LIMIT = 200  # Most recent records loaded from a store into a session list
+JOB_POLL_SECONDS = 1.0  # How often a running summarization job is checked
+
+ALL = "All"
+ARTICLE_STATUSES = ["Summarized", "Not summarized"]
+SUMMARY_STATUSES = ["Summarized", "Error", "Too short"]
+
+
+def newest_first(article):
+    ts = published_timestamp(article.get('published'))
+    return (ts is None, -(ts or 0))
+
+
+def oldest_first(article):
+    ts = published_timestamp(article.get('published'))
+    return (ts is None, ts or 0)
+
+
+SORT_ORDERS = {
+    "Newest first": newest_first,
+    "Oldest first": oldest_first,
+    "Source": lambda article: ((article.get('source') or 'Unknown').lower(), newest_first(article)),
+    "Title": lambda article: article.get('title', '').lower(),
+}
+
+# The same orders in the article index, as (order_by, descending)
+ARCHIVE_ORDERS = {
+    "Newest first": ('published', True),
+    "Oldest first": ('published', False),
+    "Source": ('source', False),
+    "Title": ('title', False),
+}
+
+
+def articles_store():
+    return get_store(ARTICLES_STORE, legacy_json=ARTICLES_FILE)
+
+
+def summaries_store():
+    return get_store(SUMMARIES_STORE, legacy_json=SUMMARY_FILE)
 
-def load_saved_articles():
-    # Load articles from JSON file
-    if os.path.exists(ARTICLES_FILE):
-        with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+
+def load_saved_articles(limit=LOAD_LIMIT):
+    # Load the most recent articles from the store; their content stays on disk until shown
+    return Article.from_dicts(articles_store().latest_unique(limit))
 
 
 def save_articles(articles):
-    # Save articles to JSON file
-    with open(ARTICLES_FILE, "w", encoding="utf-8") as f:
-        json.dump(articles, f, ensure_ascii=False, indent=2)
+    # Append articles to the store, referencing their content instead of copying it
+    articles_store().extend([article.to_record() for article in Article.from_dicts(articles)])
 
 
-def load_saved_summaries():
-    # Load summaries from JSON file
-    if os.path.exists(SUMMARY_FILE):
-        with open(SUMMARY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+def load_saved_summaries(limit=LOAD_LIMIT):
+    # Load the most recent summaries from the store
+    return Article.from_dicts(summaries_store().latest_unique(limit))
 
 
 def save_summaries(summaries):
-    # Save summaries to JSON file
-    with open(SUMMARY_FILE, "w", encoding="utf-8") as f:
-        json.dump(summaries, f, ensure_ascii=False, indent=2)
+    # Append summaries to the store and record them in the article index
+    summaries = Article.from_dicts(summaries)
+    summaries_store().extend([summary.to_record() for summary in summaries])
+    get_article_index().add_many(summaries)
+    return summaries
+
+
+@st.cache_resource(show_spinner="Loading summarization model...")
+def load_model():
+    # Shared across reruns and sessions, so the weights are loaded once per server process
+    return get_local_model()
+
+
+def unload_model():
+    # Release the cached model; the next summarization loads it again
+    load_model.clear()
+    unload_local_model()
+
+
+def list_cache(name, records, classify, version=None):
+    # Sources, statuses and filtered views of a session list, kept in the session between
+    # reruns and rebuilt only when the list (or what its statuses depend on) changes.
+    # Session lists are filtered here rather than in the article index because they hold
+    # records the index cannot list: articles whose content is indexed under another URL,
+    # and this session's failed or too-short summaries. They stay within LOAD_LIMIT; the
+    # whole archive is paginated and filtered in SQL on the Archive page.
+    cache = st.session_state.get(f"{name}_cache")
+    if (cache is None or cache['records'] is not records or cache['length'] != len(records)
+            or cache['version'] is not version):
+        cache = {
+            'records': records,
+            'length': len(records),
+            'version': version,
+            'sources': sorted({article.get('source') or 'Unknown' for article in records}),
+            'statuses': classify(records),
+            'views': {},
+        }
+        st.session_state[f"{name}_cache"] = cache
+    return cache
+
+
+def filtered_view(cache, source, status, order):
+    # Positions of the records passing the filters, in display order
+    key = (source, status, order)
+    if key not in cache['views']:
+        records, statuses = cache['records'], cache['statuses']
+        positions = [i for i, article in enumerate(records)
+                     if (source == ALL or (article.get('source') or 'Unknown') == source)
+                     and (status == ALL or statuses[i] == status)]
+        positions.sort(key=lambda i: SORT_ORDERS[order](records[i]))
+        cache['views'][key] = positions
+    return cache['views'][key]
+
+
+def list_controls(name, cache, statuses):
+    # Source, status and sort pickers for a list page
+    col1, col2, col3 = st.columns(3)
+    source = col1.selectbox("Source", [ALL] + cache['sources'], key=f"{name}_source")
+    status = col2.selectbox("Status", [ALL] + statuses, key=f"{name}_status")
+    order = col3.selectbox("Sort by", list(SORT_ORDERS), key=f"{name}_order")
+    return filtered_view(cache, source, status, order)
+
+
+def page_slice(positions):
+    # Page picker; returns the positions on the chosen page and the number of its first item
+    pages = max(1, (len(positions) + PAGE_SIZE - 1) // PAGE_SIZE)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) - 1
+    return positions[page * PAGE_SIZE:(page + 1) * PAGE_SIZE], page * PAGE_SIZE + 1
+
+
+def article_statuses(articles):
+    # Whether each article has a summary, from the article index in one pass
+    summarized = get_article_index().summarized(article.get('url', '') for article in articles)
+    return ["Summarized" if is_summary(article.get('summary')) or canonical_url(article.get('url')) in summarized
+            else "Not summarized" for article in articles]
+
+
+def summary_statuses(summaries):
+    # Failure placeholders of every summarizer path count as errors, not as summaries
+    statuses = []
+    for article in summaries:
+        summary = article.get('summary', '')
+        if summary == 'Content too short':
+            statuses.append("Too short")
+        elif not is_summary(summary):
+            statuses.append("Error")
+        else:
+            statuses.append("Summarized")
+    return statuses
 
 
 def fetch_articles():
     # Fetch articles from RSS feeds and save them to session state"
     with st.spinner("Fetching articles from RSS feeds..."):
-        articles = get_astronomy_articles()
+        articles = get_astronomy_articles(index=get_article_index(),
+                                          near_duplicates=get_near_duplicate_index())
 
     if not articles:
         st.error("No articles found!")
@@ -51,35 +179,99 @@ def fetch_articles():
     return articles
 
 
-def generate_summaries(articles):
-    # Generate summaries for the fetched articles
-
-    # Setup model
-    setup_local_model()
-
-    # Load tokenizer and summarizer
-    tokenizer = AutoTokenizer.from_pretrained("local_falconsai_model")
-    summarizer = load_local_summarizer()
-
-    # Process each article with progress bar
-    progress_bar = st.progress(0)
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress():
+    # Poll the background summarization job; only this fragment reruns while it works
+    job = get_job(st.session_state.summary_job)
+    if job is None:
+        del st.session_state.summary_job
+        return
 
-    # processing articles
-    for i, article in enumerate(articles):
-        progress_bar.progress((i + 1) / len(articles))
+    if job['status'] in ('queued', 'running'):
+        if not worker_alive():
+            st.warning("⏳ Waiting for the summarization worker to start...")
+        label = "Queued" if job['status'] == 'queued' else f"Summarized {job['done']}/{job['total']}"
+        st.progress(job['progress'], text=f"🤖 {label}")
+        return
 
-        if article.get('content') and len(article['content'].strip()) > 50:
+    # Finished: keep the results, which the worker has saved, then refresh the whole page
+    del st.session_state.summary_job
+    if job['status'] == 'failed':
+        st.session_state.job_error = job['error']
+    else:
+        st.session_state.summaries = Article.from_dicts(job['results'])
+    st.rerun()
+
+
+def stream_summaries():
+    # Fetch and summarize articles as a stream, showing and saving each summary as soon as it is ready
+    summarizer, tokenizer = load_model()
+    articles, summaries = [], []
+    status = st.empty()
+    live = st.container()
+
+    status.info("📡 Waiting for the first article...")
+    fetched = iter_astronomy_articles(index=get_article_index(),
+                                      near_duplicates=get_near_duplicate_index())
+    for article in summarize_stream(fetched, summarizer, tokenizer):
+        articles.append(article)
+        summaries.append(article)
+        save_summaries([article])
+
+        with live:
+            st.markdown(f"**{len(summaries)}. {article['title']}**")
+            st.success(article['summary'])
+        status.info(f"⚡ {len(summaries)} articles summarized, still fetching...")
+
+    status.empty()
+    return articles, summaries
+
+
+def stream_backends():
+    # Backends that can summarize right now, by name
+    return {backend.name: backend for backend in get_router().backends if backend.usable()}
+
+
+def timed_stream(pieces, backend):
+    # Pass a summary stream through, timing its first piece (what the reader waits for) and the whole
+    start = time.perf_counter()
+    first = True
+    for piece in pieces:
+        if first:
+            metrics.observe("summary_first_token_seconds", time.perf_counter() - start, backend=backend)
+            first = False
+        yield piece
+    metrics.observe("summary_stream_seconds", time.perf_counter() - start, backend=backend)
+
+
+def stream_article_summaries(articles, backend):
+    # Summarize articles one at a time, rendering each summary token by token as it is written
+    if backend.name == "local":
+        load_model()
+    summaries = []
+    status = st.empty()
+
+    for n, article in enumerate(articles, 1):
+        status.info(f"⚡ Summarizing article {n}/{len(articles)} with {backend.name}...")
+        st.markdown(f"**{n}. {article['title']}**")
+        reused = indexed_summary(article['duplicate_of']) if article.get('duplicate_of') else None
+        if reused:
+            article['summary'] = reused
+            st.success(reused)
+        elif too_short(article):
+            article['summary'] = "Content too short"
+            st.warning(article['summary'])
+        else:
             try:
-                summary = summarize_single_article(
-                    article['content'], summarizer, tokenizer)
-                article['summary'] = summary            
+                summary = st.write_stream(timed_stream(backend.stream(article['content']), backend.name))
+                article['summary'] = "".join(summary).strip()
             except Exception as e:
-                article['summary'] = f"Error: {str(e)}"              
-        else:
-            article['summary'] = "Content too short"
-            
-    progress_bar.empty()
-    return articles
+                article['summary'] = f"Error: {str(e)}"
+                st.error(article['summary'])
+        summaries.extend(save_summaries([article]))
+
+    status.empty()
+    return summaries
 
 
 def articles_page():
@@ -88,7 +280,7 @@ def articles_page():
     st.write("Get the latest astronomy news articles from RSS feeds")
 
     # Buttons for article operations
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
 
     with col1:
         if st.button("🔄 Fetch New Articles", type="primary"):
@@ -113,11 +305,33 @@ def articles_page():
                 del st.session_state.articles
             st.success("Articles cleared!")
 
+    with col4:
+        live_clicked = st.button("⚡ Fetch & Summarize Live")
+
+    # Live results span the full page width
+    if live_clicked:
+        articles, summaries = stream_summaries()
+        if articles:
+            st.session_state.articles = articles
+            st.session_state.summaries = summaries
+            save_articles(articles)
+            st.success(f"✅ Summarized {len(summaries)} articles!")
+        else:
+            st.error("No articles found!")
+
     # Display articles
     if "articles" in st.session_state:
         st.subheader(f"📄 Articles ({len(st.session_state.articles)})")
 
-        for i, article in enumerate(st.session_state.articles, 1):
+        cache = list_cache("articles", st.session_state.articles, article_statuses,
+                           version=st.session_state.get('summaries'))
+        positions = list_controls("articles", cache, ARTICLE_STATUSES)
+        visible, first = page_slice(positions)
+        st.caption(f"{len(positions)} matching articles")
+
+        # Only the visible page is turned into widgets
+        for i, position in enumerate(visible, first):
+            article = st.session_state.articles[position]
             with st.expander(f"{i}. {article['title'][:250]}..."):
 
                 # Title
@@ -127,7 +341,7 @@ def articles_page():
                 content = article.get('content', 'No content available')
                 st.write("**Content Preview:**")
                 st.text_area("", content[:500] + "..." if len(content) > 500 else content,
-                             height=150, disabled=True, key=f"content_{i}")
+                             height=150, disabled=True, key=f"content_{position}")
 
                 # Source, published date, and URL
                 st.write(f"**Source:** {article.get('source', 'Unknown')}")
@@ -159,17 +373,14 @@ def summaries_page():
     st.info(f"📄 Found {len(articles)} articles ready for summarization")
 
     # Buttons for summary operations
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        if st.button("🤖 Generate Summaries", type="primary"):
-            with st.spinner("Generating summaries..."):
-                summaries = generate_summaries(articles.copy())
-                if summaries:
-                    st.session_state.summaries = summaries
-                    save_summaries(summaries)
-                    st.success(
-                        f"✅ Generated summaries for {len(summaries)} articles!")
+        if st.button("🤖 Generate Summaries", type="primary",
+                     disabled="summary_job" in st.session_state):
+            # The worker process does the work; identical in-flight jobs are shared
+            st.session_state.summary_job = submit_job(articles)
+            ensure_worker()
 
     with col2:
         if st.button("📂 Load Saved Summaries"):
@@ -186,11 +397,33 @@ def summaries_page():
                 del st.session_state.summaries
             st.success("Summaries cleared!")
 
+    with col4:
+        backends = stream_backends()
+        backend = st.selectbox("Stream with", list(backends), key="stream_backend")
+        stream_clicked = st.button("⚡ Stream Summaries", disabled=backend is None)
+
+    # Streamed summaries span the full page width
+    if stream_clicked:
+        st.session_state.summaries = stream_article_summaries(articles, backends[backend])
+        st.success(f"✅ Summarized {len(st.session_state.summaries)} articles!")
+
+    if "summary_job" in st.session_state:
+        job_progress()
+    if "job_error" in st.session_state:
+        st.error(f"Summarization failed: {st.session_state.pop('job_error')}")
+
     # Display summaries
     if "summaries" in st.session_state:
         st.subheader(f"📝 Summaries ({len(st.session_state.summaries)})")
 
-        for i, article in enumerate(st.session_state.summaries, 1):
+        cache = list_cache("summaries", st.session_state.summaries, summary_statuses)
+        positions = list_controls("summaries", cache, SUMMARY_STATUSES)
+        visible, first = page_slice(positions)
+        st.caption(f"{len(positions)} matching summaries")
+
+        # Only the visible page is turned into widgets
+        for i, position in enumerate(visible, first):
+            article = st.session_state.summaries[position]
             with st.expander(f"{i}. {article['title'][:80]}..."):
 
                 # Title
@@ -221,6 +454,127 @@ def summaries_page():
         st.info("👆 Click 'Generate Summaries' to create summaries from your articles!")
 
 
+def archive_page():
+    # Page for searching every article ever fetched, one page at a time
+    st.header("🗄️ Archive")
+    st.write("Search all fetched articles and summaries")
+
+    index = get_article_index()
+    query = st.text_input("🔎 Search titles, content and summaries")
+
+    # Filtering, sorting and paging all happen in SQL; only the visible page is loaded
+    col1, col2, col3 = st.columns(3)
+    source = col1.selectbox("Source", [ALL] + index.sources(), key="archive_source")
+    status = col2.selectbox("Status", [ALL] + ARTICLE_STATUSES, key="archive_status")
+    orders = (["Relevance"] if query else []) + list(ARCHIVE_ORDERS)
+    order = col3.selectbox("Sort by", orders, key="archive_order")
+    filters = {
+        'query': query,
+        'source': None if source == ALL else source,
+        'has_summary': None if status == ALL else status == "Summarized",
+    }
+
+    total = index.count(**filters)
+    if total == 0:
+        st.info("No matching articles." if query or source != ALL or status != ALL
+                else "The archive is empty. Fetch some articles first!")
+        return
+
+    pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) - 1
+    st.caption(f"{total} articles")
+
+    order_by, descending = ARCHIVE_ORDERS.get(order, ('relevance', False))
+    results = index.page(page, order_by=order_by, descending=descending, **filters)
+
+    for i, article in enumerate(results, page * PAGE_SIZE + 1):
+        with st.expander(f"{i}. {article['title'][:250]}"):
+            if is_summary(article['summary']):
+                st.write("**Summary:**")
+                st.success(article['summary'])
+            else:
+                st.write("**Content Preview:**")
+                st.write(article['content'][:500] + ("..." if len(article['content']) > 500 else ""))
+
+            st.write(f"**Source:** {article.get('source') or 'Unknown'}")
+            if article.get('published'):
+                st.write(f"**Published:** {article['published'][:-5]}")
+            if article.get('url'):
+                st.markdown(f"[🔗 Read Full Article]({article['url']})")
+
+
+def stage_rows(counters, histograms):
+    # One table row per timed stage and label set
+    rows = []
+    for (name, labels), histogram in sorted(histograms.items()):
+        if not name.endswith("_seconds"):
+            continue
+        stage = name[:-len("_seconds")]
+        rows.append({
+            'stage': stage,
+            'labels': ", ".join(f"{k}={v}" for k, v in labels),
+            'count': histogram.count,
+            'total (s)': round(histogram.sum, 3),
+            'mean (ms)': round(1000 * histogram.sum / histogram.count, 1) if histogram.count else 0.0,
+            'p50 ≤ (s)': histogram.quantile(0.5),
+            'p95 ≤ (s)': histogram.quantile(0.95),
+            'failures': counters.get((f"{stage}_failures_total", labels), 0),
+        })
+    return rows
+
+
+def counter_total(counters, name):
+    return sum(value for (counter, _), value in counters.items() if counter == name)
+
+
+def metrics_page():
+    # Page showing the timings and counters collected in this process
+    st.header("📈 Metrics")
+    st.write("Where the time goes, stage by stage")
+
+    if metrics.REGISTRY not in metrics.active_sinks():
+        st.info(f"Metrics are not being collected in this process. Set {metrics.METRICS_ENV}=registry "
+                "before starting the app, or start collecting now.")
+        if st.button("▶️ Start Collecting"):
+            metrics.configure(",".join(filter(None, [os.getenv(metrics.METRICS_ENV, ""), "registry"])))
+            st.rerun()
+        return
+
+    counters, histograms = metrics.REGISTRY.snapshot()
+    if not counters and not histograms:
+        st.info("Nothing measured yet. Fetch or summarize some articles first!")
+        return
+
+    generate = [h for (name, _), h in histograms.items() if name == "generate_seconds"]
+    generate_seconds = sum(h.sum for h in generate)
+    hits = counter_total(counters, "summary_cache_hits_total")
+    lookups = hits + counter_total(counters, "summary_cache_misses_total")
+
+    first_token = [h for (name, _), h in histograms.items() if name == "summary_first_token_seconds"]
+    first_token_count = sum(h.count for h in first_token)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Generated tokens/sec", f"{counter_total(counters, 'generated_tokens_total') / generate_seconds:.1f}"
+                if generate_seconds else "–")
+    col2.metric("Summary cache hit rate", f"{hits / lookups:.0%}" if lookups else "–")
+    col3.metric("Failed article downloads", counter_total(counters, "article_failures_total"))
+    col4.metric("Mean time to first summary token",
+                f"{sum(h.sum for h in first_token) / first_token_count:.2f}s" if first_token_count else "–")
+
+    st.subheader("Stages")
+    st.dataframe(stage_rows(counters, histograms), use_container_width=True)
+
+    st.subheader("Counters")
+    st.dataframe([{'counter': name, 'labels': ", ".join(f"{k}={v}" for k, v in labels), 'value': value}
+                  for (name, labels), value in sorted(counters.items())], use_container_width=True)
+    st.caption("Summaries generated by the background worker are measured in its own process; "
+               f"give it a json or prometheus sink through {metrics.METRICS_ENV}.")
+
+    if st.button("🔄 Reset Metrics"):
+        metrics.REGISTRY.reset()
+        st.rerun()
+
+
 def main():
     # Streamlit app configuration
     st.set_page_config(
@@ -236,13 +590,21 @@ def main():
     # Sidebar navigation
     st.sidebar.title("Navigation")
     page = st.sidebar.selectbox(
-        "Choose a page:", ["📰 Articles", "🤖 Summaries"])
+        "Choose a page:", ["📰 Articles", "🤖 Summaries", "🗄️ Archive", "📈 Metrics"])
+
+    if st.sidebar.button("🧹 Unload Model"):
+        unload_model()
+        st.sidebar.success("Model unloaded!")
 
     # Page routing
     if page == "📰 Articles":
         articles_page()
     elif page == "🤖 Summaries":
         summaries_page()
+    elif page == "🗄️ Archive":
+        archive_page()
+    elif page == "📈 Metrics":
+        metrics_page()
 
 # Run the app
 if __name__ == "__main__":